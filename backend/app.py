@@ -1,24 +1,320 @@
-from flask import Flask, jsonify, request
-from services.bigquery_service import fetch_data, fetch_filters
+from flask import Flask, Response, g, jsonify, make_response, request, stream_with_context
+from werkzeug.http import is_resource_modified
+from services.bigquery_service import (
+    fetch_data_page, fetch_data_arrow, fetch_data_series, fetch_data_stats, fetch_data_with_weather,
+    fetch_filters, stream_data, export_data, refresh_serving_table, npdes_version, weather_version,
+    FILTER_CACHE, INFLIGHT, RESULT_CACHE, WATERMARK_CACHE,
+)
+from services.deadlines import Deadline
+from services.encoding import OrjsonProvider, choose_encoding, compress, compress_stream, dumps_line, weak_etag
+from services.export import EXPORT_FORMATS, csv_gzip_chunks, parquet_chunks
+from services.metrics import counted_body, metrics_payload, observe_request
+from config import REQUEST_TIMEOUT, MAX_REQUEST_TIMEOUT, FILTER_CACHE_TTL, COMPRESS_MIN_BYTES
+import datetime
+import functools
+import hashlib
+import pyarrow as pa
+import json
 import os
+import time
 
 # Create Flask app at top level
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+def wants_ndjson():
+    """True when the client asked for a streamed newline-delimited JSON body"""
+    if request.args.get("stream", "").lower() in ("1", "true"):
+        return True
+    return NDJSON_MIMETYPE in request.headers.get("Accept", "")
+
+def ndjson_response(rows):
+    """Streams an iterator of row dicts as one JSON object per line"""
+    def lines():
+        for row in rows:
+            yield dumps_line(row)
+    return Response(stream_with_context(lines()), mimetype=NDJSON_MIMETYPE)
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+def wants_arrow():
+    """True when the client accepts an Arrow IPC stream"""
+    return ARROW_MIMETYPE in request.headers.get("Accept", "")
+
+def arrow_response(table, next_cursor=None):
+    """
+    Serializes a pyarrow.Table as an Arrow IPC stream. The cursor for the
+    next page, if any, is sent in the X-Next-Cursor header.
+    """
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = Response(sink.getvalue().to_pybytes(), mimetype=ARROW_MIMETYPE)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def request_deadline():
+    """
+    Deadline for this request's BigQuery work, from the X-Request-Timeout
+    header or the timeout query param (seconds), capped at MAX_REQUEST_TIMEOUT
+    """
+    return deadline_from(request.headers, request.args)
+
+def deadline_from(headers, args):
+    """request_deadline() for any mapping-like headers and query args"""
+    value = headers.get("X-Request-Timeout") or args.get("timeout")
+    try:
+        seconds = float(value) if value else REQUEST_TIMEOUT
+    except ValueError:
+        raise ValueError("timeout must be a number of seconds")
+    if seconds <= 0:
+        raise ValueError("timeout must be positive")
+    return Deadline(min(seconds, MAX_REQUEST_TIMEOUT))
+
+# Cache-Control per kind of endpoint. Dropdown values may be reused for a
+# while; query results are stored but revalidated every time, which costs a
+# 304 and no query until new data is ingested.
+FILTERS_CACHE_CONTROL = f"public, max-age={FILTER_CACHE_TTL}"
+DATA_CACHE_CONTROL = "public, no-cache"
+NO_STORE = "no-store"
+
+# Query args that do not change the response body
+ETAG_IGNORED_ARGS = ("timeout",)
+
+def response_etag(path, arg_pairs, accept, version):
+    """
+    Strong ETag for a GET response, from the path, the (name, value) query
+    arg pairs, the Accept header and the version ([table_ref, watermark, ...])
+    of the data it reads
+    """
+    key = {
+        "path": path,
+        "args": sorted((k, v) for k, v in arg_pairs if k not in ETAG_IGNORED_ARGS),
+        "accept": accept or "",
+        "version": version,
+    }
+    encoded = json.dumps(key, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+def version_last_modified(version):
+    """Latest ingestion watermark in a version list, as a UTC datetime"""
+    watermarks = []
+    for value in version[1::2]:
+        if value:
+            watermark = datetime.datetime.fromisoformat(value)
+            if watermark.tzinfo is None:
+                watermark = watermark.replace(tzinfo=datetime.timezone.utc)
+            watermarks.append(watermark)
+    return max(watermarks) if watermarks else None
+
+def conditional(version, cache_control):
+    """
+    Route decorator adding ETag, Last-Modified and Cache-Control headers.
+    version() returns the data version the route reads; when the client's
+    If-None-Match / If-Modified-Since still matches, 304 is returned
+    without calling the route, so no query runs.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            try:
+                current = version()
+            except Exception as e:
+                # No validators without a watermark; serve the route as usual
+                print("Error reading data version:", e)
+                return view(*args, **kwargs)
+            etag = response_etag(
+                request.path, request.args.items(multi=True), request.headers.get("Accept"), current
+            )
+            last_modified = version_last_modified(current)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = cache_control
+            response.vary.add("Accept")
+            return response
+        return wrapped
+    return decorator
+
+def page_response(page):
+    """JSON body for a page of rows, with next_cursor mirrored in X-Next-Cursor"""
+    response = jsonify(page)
+    if page.get("next_cursor"):
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return response
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+# Registered before compress_response, so it runs after it (Flask runs
+# after_request hooks in reverse) and sees the body that is actually sent
+@app.after_request
+def record_request_metrics(response):
+    """
+    Records latency and body size per route for /metrics. Streamed bodies
+    are measured as they are sent; their latency is time to first byte.
+    """
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    seconds = time.perf_counter() - g.get("request_started", time.perf_counter())
+    if response.is_streamed:
+        response.response = counted_body(response.response, route)
+        observe_request(request.method, route, response.status_code, seconds)
+    else:
+        observe_request(request.method, route, response.status_code, seconds, response.content_length or 0)
+    return response
+
+EXPORTED_MIMETYPES = {mimetype for mimetype, _ in EXPORT_FORMATS.values()}
+
+@app.after_request
+def compress_response(response):
+    """
+    gzip/zstd-encodes bodies of COMPRESS_MIN_BYTES or more when the client
+    accepts it. Streamed bodies are always compressed, chunk by chunk.
+    """
+    if response.status_code in (204, 304) or response.status_code < 200 or "Content-Encoding" in response.headers:
+        return response
+    if response.mimetype in EXPORTED_MIMETYPES:
+        # Export files are compressed already
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_BYTES:
+            return response
+        response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    if "ETag" in response.headers:
+        response.headers["ETag"] = weak_etag(response.headers["ETag"])
+    return response
 
 @app.route("/filters", methods=["GET"])
+@conditional(npdes_version, FILTERS_CACHE_CONTROL)
 def get_filters():
-    """Returns unique values for dropdowns"""
+    """
+    Returns unique values for dropdowns.
+    Query params (all optional): outfall, parameter, base, unit
+    narrow the other dropdowns to values that still match.
+    """
     try:
-        filters = fetch_filters()
+        selection = {
+            "outfall": request.args.get("outfall"),
+            "parameter": request.args.get("parameter"),
+            "base": request.args.get("base"),
+            "unit": request.args.get("unit"),
+        }
+        filters = fetch_filters(selection)
         return jsonify(filters), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/data", methods=["GET"])
+@conditional(npdes_version, DATA_CACHE_CONTROL)
 def get_data():
     """
     Query params (all optional):
-    outfall, parameter, base, unit, start_date, end_date, limit
+    outfall, parameter, base, unit, start_date, end_date, limit,
+    cursor (next_cursor from the previous page),
+    fields (comma-separated columns to return; default all),
+    sort (column to order by, "-column" for descending; default date order)
+    and offset (rows to skip) for numbered pages, e.g. a sortable table,
+    stream (1 for newline-delimited JSON),
+    timeout (seconds before the BigQuery job is cancelled; or X-Request-Timeout)
+    Send Accept: application/vnd.apache.arrow.stream for an Arrow IPC body.
+
+    For charts, bucket (day, week, month) or points (LTTB point budget)
+    return a downsampled dmr_value series over the full history instead.
+    """
+    try:
+        params = data_params(request.args)
+        if request.args.get("bucket") or request.args.get("points"):
+            series = fetch_data_series(params, request.args.get("bucket"), request.args.get("points"))
+            return jsonify({"data": series}), 200
+        deadline = request_deadline()
+        if wants_ndjson():
+            return ndjson_response(stream_data(params, deadline))
+        if wants_arrow():
+            return arrow_response(*fetch_data_arrow(params, deadline))
+        return page_response(fetch_data_page(params, deadline)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def data_params(args):
+    """/data query args as the params dict fetch_data() takes"""
+    return {
+        "outfall": args.get("outfall"),
+        "parameter": args.get("parameter"),
+        "base": args.get("base"),
+        "unit": args.get("unit"),
+        "start_date": args.get("start_date"),
+        "end_date": args.get("end_date"),
+        "limit": int(args.get("limit", 1000)),
+        "cursor": args.get("cursor"),
+        "fields": args.get("fields"),
+        "sort": args.get("sort"),
+        "offset": int(args.get("offset") or 0),
+    }
+
+def group_by_arg():
+    """Parses the comma-separated group_by query param"""
+    value = request.args.get("group_by", "")
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+@app.route("/data/stats", methods=["GET"])
+@conditional(npdes_version, DATA_CACHE_CONTROL)
+def get_data_stats():
+    """
+    Summary statistics of dmr_value, computed in BigQuery over the full series.
+    Query params (all optional):
+    outfall, parameter, base, unit, start_date, end_date,
+    group_by (comma-separated: outfall, parameter, month)
+    """
+    try:
+        params = {
+            "outfall": request.args.get("outfall"),
+            "parameter": request.args.get("parameter"),
+            "base": request.args.get("base"),
+            "unit": request.args.get("unit"),
+            "start_date": request.args.get("start_date"),
+            "end_date": request.args.get("end_date"),
+        }
+        results = fetch_data_stats(params, group_by_arg())
+        return jsonify({"stats": results}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/data/with-weather", methods=["GET"])
+@conditional(lambda: npdes_version() + weather_version(), DATA_CACHE_CONTROL)
+def get_data_with_weather():
+    """
+    NPDES readings joined to precipitation in BigQuery.
+    Query params (all optional):
+    outfall, parameter, base, unit, start_date, end_date, limit,
+    lookback_days (precipitation summed over this many days before each
+    monitoring date, default 7), station_id (default: average of stations)
     """
     try:
         params = {
@@ -30,36 +326,128 @@ def get_data():
             "end_date": request.args.get("end_date"),
             "limit": int(request.args.get("limit", 1000)),
         }
-        results = fetch_data(params)
+        results = fetch_data_with_weather(
+            params, request.args.get("lookback_days"), request.args.get("station_id"),
+        )
         return jsonify({"data": results}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/data/by-outfall", methods=["GET"])
+@conditional(npdes_version, DATA_CACHE_CONTROL)
 def get_data_by_outfall():
-    print('sdofnsogfn')
-    """Get all data for a specific outfall (no other filters)"""
+    """
+    Get all data for a specific outfall (no other filters).
+    Accepts limit, cursor, fields, stream and timeout as /data does.
+    """
     try:
         outfall = request.args.get("outfall")
         if not outfall:
             return jsonify({"error": "outfall parameter required"}), 400
         
-        limit = int(request.args.get("limit", 10000))
-        results = fetch_data({"outfall": outfall, "limit": limit})
-        return jsonify({"data": results}), 200
+        params = {
+            "outfall": outfall,
+            "limit": int(request.args.get("limit", 10000)),
+            "cursor": request.args.get("cursor"),
+            "fields": request.args.get("fields"),
+        }
+        deadline = request_deadline()
+        if wants_ndjson():
+            return ndjson_response(stream_data(params, deadline))
+        return page_response(fetch_data_page(params, deadline)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/export", methods=["GET"])
+def export():
+    """
+    Downloads every NPDES row matching the filters as a file, however many
+    there are. Query params (all optional):
+    outfall, parameter, base, unit, start_date, end_date, fields, sort,
+    format (parquet, the default, or csv for gzip-compressed CSV),
+    timeout (seconds the query may run, as for /data)
+
+    The result is read in parallel slices and written out a row group at a
+    time, so memory use does not grow with the export's size.
+    """
+    try:
+        export_format = request.args.get("format", "parquet")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        tables = export_data(data_params(request.args), request_deadline())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    chunks = parquet_chunks(tables) if export_format == "parquet" else csv_gzip_chunks(tables)
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="npdes_export.{extension}"'
+    response.headers["Cache-Control"] = NO_STORE
+    return response
+
 # Optional: health check
 @app.route("/health", methods=["GET"])
 def health():
-    return "okay, this route works", 200
+    return "okay, this route works", 200, {"Cache-Control": NO_STORE}
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus metrics: request latency and response size per route, and
+    duration, bytes processed/billed, slot time, cache hits and rows of
+    every BigQuery job
+    """
+    body, content_type = metrics_payload()
+    return Response(body, content_type=content_type, headers={"Cache-Control": NO_STORE})
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Returns counters for the server-side caches and query coalescing"""
+    return jsonify({
+        "filters": FILTER_CACHE.stats(),
+        "watermarks": WATERMARK_CACHE.stats(),
+        "results": RESULT_CACHE.stats(),
+        "inflight": INFLIGHT.stats(),
+    }), 200, {"Cache-Control": NO_STORE}
+
+@app.cli.command("refresh-serving-table")
+def refresh_serving_table_command():
+    """Rebuilds the partitioned serving table from npdes_monitoring"""
+    result = refresh_serving_table()
+    print(f"Refreshed {result['table']} (job {result['job_id']}, {result['bytes_processed']} bytes processed)")
 
 from services.bigquery_service import (
-    fetch_weather_data, fetch_weather_filters
+    fetch_weather_data, fetch_weather_data_arrow, fetch_weather_filters, fetch_weather_series,
+    fetch_weather_stats, stream_weather_data,
 )
 
+def weather_params(args):
+    """/weather/data query args as the params dict fetch_weather_data() takes"""
+    return {
+        "station_id": args.get("station_id"),
+        "parent_facility_id": args.get("parent_facility_id"),
+        "start_date": args.get("start_date"),
+        "end_date": args.get("end_date"),
+        "limit": int(args.get("limit", 1000)),
+        "fields": args.get("fields"),
+        "sort": args.get("sort"),
+        "offset": int(args.get("offset") or 0),
+    }
+
 @app.route("/weather/filters", methods=["GET"])
+@conditional(weather_version, FILTERS_CACHE_CONTROL)
 def get_weather_filters():
     """Returns unique weather dropdown values"""
     try:
@@ -69,23 +457,66 @@ def get_weather_filters():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/weather/data", methods=["GET"])
+@conditional(weather_version, DATA_CACHE_CONTROL)
 def get_weather_data():
-    """Fetch weather data based on filters"""
+    """
+    Fetch weather data based on filters.
+    Supports ?stream=1 (NDJSON) and Accept: application/vnd.apache.arrow.stream.
+    fields (comma-separated) limits the returned columns; sort, offset and
+    timeout as for /data.
+    With bucket or points, returns a downsampled series of column
+    (default prcp_inches), as /data does for dmr_value.
+    """
+    try:
+        params = weather_params(request.args)
+        if request.args.get("bucket") or request.args.get("points"):
+            series = fetch_weather_series(
+                params, request.args.get("column", "prcp_inches"),
+                request.args.get("bucket"), request.args.get("points"),
+            )
+            return jsonify({"data": series}), 200
+        deadline = request_deadline()
+        if wants_ndjson():
+            return ndjson_response(stream_weather_data(params, deadline))
+        if wants_arrow():
+            return arrow_response(fetch_weather_data_arrow(params, deadline))
+        results = fetch_weather_data(params, deadline)
+        return jsonify({"data": results}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/weather/stats", methods=["GET"])
+@conditional(weather_version, DATA_CACHE_CONTROL)
+def get_weather_stats():
+    """
+    Summary statistics of one weather column, computed in BigQuery.
+    Query params (all optional):
+    station_id, parent_facility_id, start_date, end_date,
+    column (default prcp_inches), group_by (comma-separated: station, month)
+    """
     try:
         params = {
             "station_id": request.args.get("station_id"),
             "parent_facility_id": request.args.get("parent_facility_id"),
             "start_date": request.args.get("start_date"),
             "end_date": request.args.get("end_date"),
-            "limit": int(request.args.get("limit", 1000)),
         }
-        results = fetch_weather_data(params)
-        return jsonify({"data": results}), 200
+        column = request.args.get("column", "prcp_inches")
+        results = fetch_weather_stats(params, column, group_by_arg())
+        return jsonify({"stats": results}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-
 if __name__ == "__main__":
     port = int(os.environ.get("BACKEND_PORT", 8080))
     app.run(host="0.0.0.0", port=port, debug=True)
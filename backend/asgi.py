@@ -0,0 +1,158 @@
+"""
+ASGI entry point, served by default (see the Dockerfile), for serving from
+an event loop instead of a thread per request:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+
+Plain JSON row requests to /data and /weather/data are handled here with
+asyncio. Their BigQuery jobs are awaited without holding a thread, and
+cancelled when the request's deadline passes or the client disconnects.
+They get the same ETag / 304 handling, compression and /metrics recording
+as the Flask routes.
+Every other request (streams, Arrow, chart series, stats, filters, ...)
+is passed to the Flask app unchanged.
+"""
+import asyncio
+import time
+
+from a2wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from werkzeug.http import http_date, is_resource_modified
+
+from app import (
+    app as flask_app, ARROW_MIMETYPE, DATA_CACHE_CONTROL, NDJSON_MIMETYPE,
+    data_params, deadline_from, response_etag, version_last_modified, weather_params,
+)
+from services.bigquery_service import (
+    fetch_data_page_async, fetch_weather_data_async, npdes_version, weather_version,
+)
+from services.deadlines import ClientDisconnected
+from services.encoding import choose_encoding, compress, weak_etag
+from services.metrics import observe_request
+from config import COMPRESS_MIN_BYTES
+
+FLASK = WSGIMiddleware(flask_app)
+
+
+async def data(request):
+    params = data_params(request.query_params)
+    page = await fetch_data_page_async(
+        params, deadline_from(request.headers, request.query_params), request.is_disconnected,
+    )
+    response = json_response(page)
+    if page.get("next_cursor"):
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return response
+
+
+async def weather_data(request):
+    params = weather_params(request.query_params)
+    rows = await fetch_weather_data_async(
+        params, deadline_from(request.headers, request.query_params), request.is_disconnected,
+    )
+    return json_response({"data": rows})
+
+
+# path -> (endpoint, version of the data it reads)
+ASYNC_ROUTES = {
+    "/data": (data, npdes_version),
+    "/weather/data": (weather_data, weather_version),
+}
+
+
+def json_response(payload, status_code=200):
+    """JSON body encoded exactly as Flask's jsonify() would"""
+    body = flask_app.json.response(payload).get_data()
+    return Response(body, status_code, media_type="application/json")
+
+
+def served_async(request):
+    """True for the plain JSON row requests handled by ASYNC_ROUTES"""
+    args = request.query_params
+    if args.get("bucket") or args.get("points"):
+        return False
+    if args.get("stream", "").lower() in ("1", "true"):
+        return False
+    accept = request.headers.get("accept", "")
+    return NDJSON_MIMETYPE not in accept and ARROW_MIMETYPE not in accept
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] in ASYNC_ROUTES:
+        request = Request(scope, receive)
+        if served_async(request):
+            started = time.perf_counter()
+            response = await handle(*ASYNC_ROUTES[scope["path"]], request)
+            encode_response(response, request)
+            await response(scope, receive, send)
+            observe_request(
+                request.method, scope["path"], response.status_code,
+                time.perf_counter() - started, len(response.body),
+            )
+            return
+    await FLASK(scope, receive, send)
+
+
+async def handle(endpoint, version, request):
+    """
+    Runs an async endpoint with the same conditional request handling and
+    error mapping as the Flask routes
+    """
+    try:
+        current = await asyncio.to_thread(version)
+    except Exception as e:
+        print("Error reading data version:", e)
+        return await run(endpoint, request)
+
+    etag = response_etag(
+        request.url.path, request.query_params.multi_items(), request.headers.get("accept"), current
+    )
+    last_modified = version_last_modified(current)
+    environ = {
+        "REQUEST_METHOD": request.method,
+        "HTTP_IF_NONE_MATCH": request.headers.get("if-none-match", ""),
+        "HTTP_IF_MODIFIED_SINCE": request.headers.get("if-modified-since", ""),
+    }
+    if not is_resource_modified(environ, etag=etag, last_modified=last_modified):
+        response = Response(status_code=304)
+    else:
+        response = await run(endpoint, request)
+        if response.status_code != 200:
+            return response
+    response.headers["ETag"] = f'"{etag}"'
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = DATA_CACHE_CONTROL
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def encode_response(response, request):
+    """Compresses the body as the Flask app's compress_response() does"""
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    if response.status_code in (204, 304) or len(response.body) < COMPRESS_MIN_BYTES:
+        return
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return
+    response.body = compress(response.body, encoding)
+    response.headers["Content-Length"] = str(len(response.body))
+    response.headers["Content-Encoding"] = encoding
+    if "etag" in response.headers:
+        response.headers["ETag"] = weak_etag(response.headers["etag"])
+
+
+async def run(endpoint, request):
+    """Runs an async endpoint with the same error mapping as the Flask routes"""
+    try:
+        return await endpoint(request)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    except TimeoutError as e:
+        return json_response({"error": str(e)}, 504)
+    except ClientDisconnected:
+        # Nobody is listening; nginx's "client closed request" status for logs
+        return Response(status_code=499)
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
@@ -0,0 +1,84 @@
+"""
+Wire size and encode time of a 10k-row /data response.
+
+Run from backend/:
+
+    python -m benchmarks.bench_encoding [rows]
+
+Rows are synthetic but shaped like fetch_data() output (MM/DD/YYYY date
+strings, floats, None, comment text, ISO timestamps), so no BigQuery
+access is needed.
+"""
+import datetime
+import random
+import sys
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from services.encoding import ENCODINGS, OrjsonProvider, compress
+
+REPEATS = 5
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    start = datetime.date(2015, 1, 1)
+    ingested = datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc).isoformat()
+    parameters = ["pH", "Total Suspended Solids", "Oil and Grease", "Flow, in conduit or thru treatment plant"]
+    rows = []
+    for i in range(n):
+        day = start + datetime.timedelta(days=i % 3650)
+        rows.append({
+            "monitoring_period_date": day.strftime("%m/%d/%Y"),
+            "dmr_value": None if i % 17 == 0 else round(rng.uniform(0, 500), 3),
+            "outfall_number": f"{i % 12:03d}",
+            "parameter_description": parameters[i % len(parameters)],
+            "statistical_base": ["Daily Maximum", "Monthly Average"][i % 2],
+            "dmr_value_unit": ["mg/L", "SU", "MGD"][i % 3],
+            "npdes_permit_number": "WA0000001",
+            "dmr_comments": "" if i % 5 else "Sample collected after storm event; value reported per permit condition S2.",
+            "source_file_name": f"dmr_export_{day.year}.csv",
+            "ingestion_timestamp": ingested,
+        })
+    return rows
+
+
+def best_time(fn):
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main(n):
+    app = Flask(__name__)
+    payload = {"data": make_rows(n), "next_cursor": None}
+    providers = {
+        "stdlib json": DefaultJSONProvider(app),
+        "orjson": OrjsonProvider(app),
+    }
+
+    print(f"{n} rows, best of {REPEATS}\n")
+    print(f"{'encoder':<14}{'encode ms':>12}{'bytes':>12}")
+    bodies = {}
+    for name, provider in providers.items():
+        # response() is what jsonify() calls, compact separators included
+        seconds, body = best_time(lambda: provider.response(payload).get_data())
+        bodies[name] = body
+        print(f"{name:<14}{seconds * 1000:>12.1f}{len(body):>12,}")
+
+    body = bodies["orjson"]
+    print(f"\n{'encoding':<14}{'encode ms':>12}{'bytes':>12}{'ratio':>8}")
+    print(f"{'identity':<14}{0:>12.1f}{len(body):>12,}{1:>8.1f}")
+    for encoding in ENCODINGS:
+        seconds, compressed = best_time(lambda: compress(body, encoding))
+        ratio = len(body) / len(compressed)
+        print(f"{encoding:<14}{seconds * 1000:>12.1f}{len(compressed):>12,}{ratio:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
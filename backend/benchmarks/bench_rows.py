@@ -0,0 +1,55 @@
+"""
+Time to turn a 10k-row query result into the row dicts /data returns.
+
+Run from backend/:
+
+    python -m benchmarks.bench_rows [rows]
+
+Compares the per-row loop over BigQuery Row objects (dict per row plus
+ingestion_timestamp.isoformat()) with rows_from_arrow() on the same
+result as an Arrow table. Both outputs are checked to be equal.
+"""
+import datetime
+import sys
+
+import pyarrow as pa
+from google.cloud.bigquery import Row
+
+from benchmarks.bench_encoding import best_time, make_rows, REPEATS
+from services.rows import rows_from_arrow
+
+
+def make_table(n):
+    rows = make_rows(n)
+    ingested = datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc)
+    for row in rows:
+        row["ingestion_timestamp"] = ingested
+    return pa.Table.from_pylist(rows)
+
+
+def row_loop(bq_rows, fields):
+    result = []
+    for row in bq_rows:
+        values = {name: row[name] for name in fields}
+        if values.get("ingestion_timestamp"):
+            values["ingestion_timestamp"] = values["ingestion_timestamp"].isoformat()
+        result.append(values)
+    return result
+
+
+def main(n):
+    table = make_table(n)
+    fields = table.schema.names
+    index = {name: i for i, name in enumerate(fields)}
+    bq_rows = [Row(tuple(row.values()), index) for row in table.to_pylist()]
+
+    print(f"{n} rows, best of {REPEATS}\n")
+    loop_seconds, expected = best_time(lambda: row_loop(bq_rows, fields))
+    arrow_seconds, actual = best_time(lambda: rows_from_arrow(table))
+    assert actual == expected
+    print(f"{'Row loop':<16}{loop_seconds * 1000:>10.1f} ms")
+    print(f"{'rows_from_arrow':<16}{arrow_seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
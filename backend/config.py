@@ -11,6 +11,40 @@ DATASET = os.getenv("DATASET", "raw_data")
 TABLE = os.getenv("TABLE", "npdes_monitoring")
 BACKEND_PORT = int(os.getenv("BACKEND_PORT", 8080))
 
+# Typed, partitioned copy of TABLE that data queries use when it exists
+SERVING_TABLE = os.getenv("SERVING_TABLE", f"{TABLE}_serving")
+USE_SERVING_TABLE = os.getenv("USE_SERVING_TABLE", "true").lower() in ("1", "true", "yes")
+
+# Seconds before cached dropdown values are refreshed in the background
+FILTER_CACHE_TTL = int(os.getenv("FILTER_CACHE_TTL", 300))
+
+# Query result cache: in-process LRU size plus a directory shared by workers
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "/tmp/kosh-result-cache")
+# Size cap of the disk tier; least recently used files are deleted past it.
+# On Cloud Run /tmp is in memory, so this counts against the instance's RAM.
+RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024))
+# Seconds between MAX(ingestion_timestamp) checks that invalidate cached results
+WATERMARK_CHECK_INTERVAL = int(os.getenv("WATERMARK_CHECK_INTERVAL", 60))
+# Seconds a request waits on an identical query already running before giving up
+INFLIGHT_WAIT_TIMEOUT = float(os.getenv("INFLIGHT_WAIT_TIMEOUT", 120))
+# Default and maximum seconds a data request may run before its BigQuery job is
+# cancelled; clients can ask for less with X-Request-Timeout or ?timeout=
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", 60))
+MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT", 300))
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+# /export reads results in slices of this many rows (one Parquet row group
+# each), EXPORT_STREAMS slices at a time
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 100000))
+EXPORT_STREAMS = int(os.getenv("EXPORT_STREAMS", 4))
+# Results of at least this many rows are read with the BigQuery Storage Read
+# API (when google-cloud-bigquery-storage is installed), over up to
+# STORAGE_READ_STREAMS parallel streams
+USE_STORAGE_READ = os.getenv("USE_STORAGE_READ", "true").lower() in ("1", "true", "yes")
+STORAGE_READ_MIN_ROWS = int(os.getenv("STORAGE_READ_MIN_ROWS", 20000))
+STORAGE_READ_STREAMS = int(os.getenv("STORAGE_READ_STREAMS", 4))
+
 # CREDENTIALS_PATH = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 # if CREDENTIALS_PATH:
 #     os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = CREDENTIALS_PATH
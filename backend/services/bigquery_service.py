@@ -1,31 +1,333 @@
 from google.cloud import bigquery
-from config import PROJECT_ID, DATASET, TABLE
+from google.api_core.exceptions import NotFound
+import asyncio
+import datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+from config import (
+    PROJECT_ID, DATASET, TABLE, SERVING_TABLE, USE_SERVING_TABLE, FILTER_CACHE_TTL,
+    RESULT_CACHE_MAX_BYTES, RESULT_CACHE_DIR, RESULT_CACHE_DISK_MAX_BYTES,
+    WATERMARK_CHECK_INTERVAL, INFLIGHT_WAIT_TIMEOUT,
+    EXPORT_CHUNK_ROWS, EXPORT_STREAMS, USE_STORAGE_READ, STORAGE_READ_MIN_ROWS, STORAGE_READ_STREAMS,
+)
+from services.cache import RefreshingCache, ResultCache
+from services.singleflight import SingleFlight
+from services.deadlines import await_job, wait_for_job
+from services.rows import rows_from_arrow
+from services.export import read_parallel
+from services.storage_read import ResultReader, make_storage_client
+from services.metrics import InstrumentedClient
+from services.facets import FacetIndex, FACET_FIELDS
+from services.cursors import encode_cursor, decode_cursor
+from services.stats import summarize
+from services.downsample import lttb
+from services.serving import raw_source, serving_source, refresh_sql
 
-CLIENT = bigquery.Client(project=PROJECT_ID)
+# Every job started through CLIENT.query() is measured for /metrics
+CLIENT = InstrumentedClient(bigquery.Client(project=PROJECT_ID), __name__)
+
+# Reads row query results into Arrow; large ones through the Storage Read API
+RESULT_READER = ResultReader(
+    make_storage_client() if USE_STORAGE_READ else None, STORAGE_READ_MIN_ROWS, STORAGE_READ_STREAMS,
+)
+
+# Dropdown values change only when new data is ingested, so they are served
+# from memory and refreshed in the background at most once per TTL. Entries
+# are keyed by data version, so they always match the version-based ETags
+# of /filters and /weather/filters.
+FILTER_CACHE = RefreshingCache(FILTER_CACHE_TTL)
+_FILTER_KEYS = {}  # name -> FILTER_CACHE key of the current version
+
+# Query results are reused until the table's ingestion watermark advances.
+# Identical requests that miss at the same time wait on one BigQuery job.
+WATERMARK_CACHE = RefreshingCache(WATERMARK_CHECK_INTERVAL)
+INFLIGHT = SingleFlight(INFLIGHT_WAIT_TIMEOUT)
+RESULT_CACHE = ResultCache(
+    RESULT_CACHE_MAX_BYTES, RESULT_CACHE_DIR or None, INFLIGHT, RESULT_CACHE_DISK_MAX_BYTES,
+)
+
+NPDES_TABLE_REF = f"{PROJECT_ID}.{DATASET}.{TABLE}"
+SERVING_TABLE_REF = f"{PROJECT_ID}.{DATASET}.{SERVING_TABLE}"
+WEATHER_TABLE_REF = f"{PROJECT_ID}.{DATASET}.precipitation_weather"
+# Joined NPDES + weather results depend on both tables' watermarks, so they
+# are cached apart from plain NPDES results: a namespace has one version, and
+# sharing one would make each kind of request flush the other's entries
+DATA_WITH_WEATHER_NAMESPACE = f"{NPDES_TABLE_REF}+weather"
+
+# String date columns converted to native dates in Arrow results
+NPDES_DATE_FORMATS = {"monitoring_period_date": "%m/%d/%Y"}
+WEATHER_DATE_FORMATS = {"date": "%Y-%m-%d"}
+
+# Rows fetched per BigQuery page when streaming results
+STREAM_PAGE_SIZE = 2000
+
+# Keyset pagination columns selected by data queries, not returned as data
+PAGE_COLUMNS = ("_page_date", "_page_key")
+
+# Default ORDER BY of the data and weather queries, for restoring row order
+# after a parallel Storage Read API read (see ResultReader)
+DATA_ORDER = [("_page_date", "ascending"), ("_page_key", "ascending")]
+WEATHER_ORDER = [
+    ("date", "ascending"), ("station_id", "ascending"),
+    ("parent_facility_id", "ascending"), ("ingestion_timestamp", "ascending"),
+]
+
+DATA_FILTER_KEYS = ("outfall", "parameter", "base", "unit", "start_date", "end_date")
+DATA_PARAM_KEYS = DATA_FILTER_KEYS + ("cursor",)
+
+# NPDES queries read one of these; see npdes_source(). Keyset pagination
+# orders rows by date, then by a fingerprint of the row's identifying
+# columns so rows sharing a date have a stable order.
+RAW_SOURCE = raw_source(NPDES_TABLE_REF)
+SERVING_SOURCE = serving_source(SERVING_TABLE_REF)
+SERVING_EXISTS_KEY = f"{SERVING_TABLE_REF}:exists"
+
+WEATHER_PARAM_KEYS = ("station_id", "parent_facility_id", "start_date", "end_date")
+
+# group_by names accepted by the stats endpoints -> SQL expression
+NPDES_STATS_GROUPS = {
+    "outfall": "outfall_number",
+    "parameter": "parameter_description",
+    "month": "FORMAT_DATE('%Y-%m', {date_sql})",
+}
+WEATHER_STATS_GROUPS = {
+    "station": "station_id",
+    "month": "FORMAT_DATE('%Y-%m', date)",
+}
+# Bucket sizes for downsampled chart series -> DATE_TRUNC part
+SERIES_BUCKETS = {"day": "DAY", "week": "WEEK(MONDAY)", "month": "MONTH"}
+
+# Columns the data endpoints can return -> SQL expression, in response
+# order. The fields param picks a subset so unused text columns are
+# neither scanned nor shipped.
+NPDES_COLUMNS = {
+    "monitoring_period_date": "monitoring_period_date",
+    "dmr_value": "SAFE_CAST(dmr_value AS FLOAT64)",
+    "outfall_number": "outfall_number",
+    "parameter_description": "parameter_description",
+    "statistical_base": "statistical_base",
+    "dmr_value_unit": "dmr_value_unit",
+    "npdes_permit_number": "npdes_permit_number",
+    "dmr_comments": "dmr_comments",
+    "source_file_name": "source_file_name",
+    "ingestion_timestamp": "ingestion_timestamp",
+}
+WEATHER_COLUMNS = {
+    "date": "date",
+    "tavg_fahrenheit": "SAFE_CAST(tavg_fahrenheit AS FLOAT64)",
+    "tmax_fahrenheit": "SAFE_CAST(tmax_fahrenheit AS FLOAT64)",
+    "tmin_fahrenheit": "SAFE_CAST(tmin_fahrenheit AS FLOAT64)",
+    "prcp_inches": "SAFE_CAST(prcp_inches AS FLOAT64)",
+    "snow_inches": "SAFE_CAST(snow_inches AS FLOAT64)",
+    "snwd_inches": "SAFE_CAST(snwd_inches AS FLOAT64)",
+    "station_id": "station_id",
+    "parent_facility_id": "parent_facility_id",
+    "source_file_name": "source_file_name",
+    "ingestion_timestamp": "ingestion_timestamp",
+}
+
+# Days of precipitation summed before each reading by /data/with-weather
+DEFAULT_LOOKBACK_DAYS = 7
+MAX_LOOKBACK_DAYS = 365
+
+# Numeric weather columns /weather/stats and /weather/data series can use
+WEATHER_VALUE_COLUMNS = (
+    "tavg_fahrenheit", "tmax_fahrenheit", "tmin_fahrenheit",
+    "prcp_inches", "snow_inches", "snwd_inches",
+)
 
 # Fetches filters
-def fetch_filters():
+def fetch_filters(selection=None):
     """
     Returns a dict of unique values for the UI dropdowns of the ui.
+
+    selection: optional dict with any of outfall, parameter, base, unit.
+    When given, only values still valid for that partial selection are
+    returned. Served from the cached FacetIndex.
     """
-    table_ref = f"{PROJECT_ID}.{DATASET}.{TABLE}"
+    return fetch_facets().options(selection)
 
-    queries = {
-        "outfall_numbers": f"SELECT DISTINCT outfall_number FROM `{table_ref}` WHERE outfall_number IS NOT NULL ORDER BY outfall_number",
-        "parameter_descriptions": f"SELECT DISTINCT parameter_description FROM `{table_ref}` WHERE parameter_description IS NOT NULL ORDER BY parameter_description",
-        "statistical_bases": f"SELECT DISTINCT statistical_base FROM `{table_ref}` WHERE statistical_base IS NOT NULL ORDER BY statistical_base",
-        "dmr_value_units": f"SELECT DISTINCT dmr_value_unit FROM `{table_ref}` WHERE dmr_value_unit IS NOT NULL ORDER BY dmr_value_unit",
+def fetch_facets():
+    """
+    Returns the FacetIndex of the NPDES data currently served, built from
+    one grouped scan and cached until new data is ingested.
+    """
+    source = npdes_source()
+    return _versioned_filters("facets", _npdes_version(source), lambda: _query_facets(source))
+
+def _versioned_filters(name, version, loader):
+    """
+    FILTER_CACHE value for name at a data version. The entry of the
+    previous version is dropped once a new one is asked for.
+    """
+    key = ":".join([name] + [str(part) for part in version])
+    previous = _FILTER_KEYS.get(name)
+    if previous != key:
+        _FILTER_KEYS[name] = key
+        if previous is not None:
+            FILTER_CACHE.invalidate(previous)
+    return FILTER_CACHE.get(key, loader)
+
+def _query_facets(source):
+    table_ref = source["table_ref"]
+    columns = ", ".join(column for column, _ in FACET_FIELDS.values())
+
+    sql = f"""
+    SELECT {columns}, COUNT(*) AS row_count
+    FROM `{table_ref}`
+    GROUP BY {columns}
+    """
+
+    job = CLIENT.query(sql)
+    return FacetIndex(tuple(row.values()) for row in job.result())
+
+def fetch_watermark(table_ref):
+    """
+    Returns MAX(ingestion_timestamp) of a table as an ISO string.
+    Rechecked at most once per WATERMARK_CHECK_INTERVAL.
+    """
+    return WATERMARK_CACHE.get(table_ref, lambda: _query_watermark(table_ref))
+
+def _query_watermark(table_ref):
+    job = CLIENT.query(f"SELECT MAX(ingestion_timestamp) FROM `{table_ref}`")
+    watermark = next(iter(job.result()))[0]
+    return watermark.isoformat() if watermark else None
+
+def npdes_source():
+    """
+    Returns the table and SQL expressions NPDES queries should use: the
+    typed serving table when it exists and is up to date, otherwise the raw
+    table. Rows ingested since the last refresh-serving-table run are only
+    in the raw table, so it is read until the serving copy is rebuilt.
+    """
+    if not USE_SERVING_TABLE or not WATERMARK_CACHE.get(SERVING_EXISTS_KEY, _serving_table_exists):
+        return RAW_SOURCE
+    raw_watermark = fetch_watermark(NPDES_TABLE_REF)
+    serving_watermark = fetch_watermark(SERVING_TABLE_REF)
+    if raw_watermark and (
+        not serving_watermark
+        or datetime.datetime.fromisoformat(raw_watermark) > datetime.datetime.fromisoformat(serving_watermark)
+    ):
+        return RAW_SOURCE
+    return SERVING_SOURCE
+
+def _serving_table_exists():
+    try:
+        CLIENT.get_table(SERVING_TABLE_REF)
+        return True
+    except NotFound:
+        return False
+
+def _npdes_version(source):
+    """Cache version for NPDES results: the table read plus its watermark."""
+    return [source["table_ref"], fetch_watermark(source["table_ref"])]
+
+def npdes_version():
+    """Version of the NPDES data currently served, as [table_ref, watermark]."""
+    return _npdes_version(npdes_source())
+
+def weather_version():
+    """Version of the weather data, as [table_ref, watermark]."""
+    return [WEATHER_TABLE_REF, fetch_watermark(WEATHER_TABLE_REF)]
+
+def refresh_serving_table():
+    """
+    Rebuilds the serving table from npdes_monitoring and drops cached NPDES
+    results so the next requests read the new copy.
+    """
+    query_job = CLIENT.query(refresh_sql(NPDES_TABLE_REF, SERVING_TABLE_REF))
+    query_job.result()
+    WATERMARK_CACHE.invalidate(SERVING_EXISTS_KEY)
+    WATERMARK_CACHE.invalidate(SERVING_TABLE_REF)
+    FILTER_CACHE.invalidate()
+    return {
+        "table": SERVING_TABLE_REF,
+        "job_id": query_job.job_id,
+        "bytes_processed": query_job.total_bytes_processed,
     }
 
-    result = {}
-    for key, q in queries.items():
-        job = CLIENT.query(q)
-        rows = [row[0] for row in job.result() if row[0] is not None]
-        result[key] = rows
+def normalize_params(params, keys, columns=None):
+    """
+    Returns params reduced to the given filter keys plus limit, with empty
+    filters as None, so equivalent requests share one cache key. When
+    columns is given (row queries), fields and sort are validated against
+    it as well, and offset is added.
+    """
+    normalized = {key: params.get(key) or None for key in keys}
+    normalized["limit"] = int(params.get("limit") or 1000)
+    if columns is not None:
+        normalized["fields"] = select_fields(params.get("fields"), columns)
+        normalized["sort"] = select_sort(params.get("sort"), columns)
+        normalized["offset"] = int(params.get("offset") or 0)
+        if normalized["offset"] < 0:
+            raise ValueError("offset must not be negative")
+        if normalized.get("cursor") and (normalized["sort"] or normalized["offset"]):
+            raise ValueError("cursor cannot be combined with sort or offset")
+    return normalized
 
-    return result
+def select_fields(fields, columns):
+    """
+    Returns the requested column names in the allow-list's order, or all of
+    them when fields is empty. fields may be a list or a comma-separated
+    string. Raises ValueError for names not in columns.
+    """
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    requested = {name.strip() for name in fields or [] if name.strip()}
+    if not requested:
+        return list(columns)
+    unknown = requested - set(columns)
+    if unknown:
+        raise ValueError(
+            f"unknown fields: {', '.join(sorted(unknown))}; allowed: {', '.join(columns)}"
+        )
+    return [name for name in columns if name in requested]
 
-def fetch_data(params):
+def select_sort(sort, columns):
+    """
+    Validates a sort param: a column name, prefixed with "-" for descending.
+    Returns it stripped, or None for the default order. Raises ValueError
+    for names not in columns.
+    """
+    sort = (sort or "").strip()
+    if not sort:
+        return None
+    if sort.lstrip("-") not in columns:
+        raise ValueError(f"unknown sort column: {sort.lstrip('-')}; allowed: {', '.join(columns)}")
+    return sort
+
+def _order_sql(sort, columns, default_order):
+    """
+    ORDER BY list for a sort param from select_sort(); default_order breaks
+    ties so offset pages stay stable, and is the whole order when sort is None.
+    """
+    if not sort:
+        return default_order
+    direction = "DESC" if sort.startswith("-") else "ASC"
+    return f"{columns[sort.lstrip('-')]} {direction}, {default_order}"
+
+def _page_sql(params, query_params):
+    """LIMIT (and OFFSET, when set) clause for a row query."""
+    query_params.append(bigquery.ScalarQueryParameter("limit", "INT64", params.get("limit", 1000)))
+    if not params.get("offset"):
+        return "LIMIT @limit"
+    query_params.append(bigquery.ScalarQueryParameter("offset", "INT64", params["offset"]))
+    return "LIMIT @limit OFFSET @offset"
+
+def _sort_columns(source):
+    """
+    NPDES_COLUMNS as sort expressions; monitoring_period_date is MM/DD/YYYY
+    text, so it sorts by the source's parsed date instead.
+    """
+    return {**NPDES_COLUMNS, "monitoring_period_date": source["page_date_sql"]}
+
+def _select_sql(fields, columns):
+    """SELECT list for the given fields, aliased to their response names."""
+    return ",\n        ".join(
+        name if columns[name] == name else f"{columns[name]} AS {name}" for name in fields
+    )
+
+def fetch_data(params, deadline=None):
     """
     Fetches NPDES data from BigQuery with dynamic filters.
 
@@ -37,11 +339,311 @@ def fetch_data(params):
         - start_date (YYYY-MM-DD string)
         - end_date (YYYY-MM-DD string)
         - limit (int)
+        - cursor (str, next_cursor from a previous page)
+        - fields (list or comma-separated str of NPDES_COLUMNS; default all)
+        - sort (str, an NPDES_COLUMNS name, "-" prefix for descending;
+          default date order)
+        - offset (int, rows to skip; for sorted pages, which have no cursor)
+
+    deadline: optional services.deadlines.Deadline; a TimeoutError is
+        raised if the result is not ready by then. The BigQuery job is
+        cancelled once no identical request is still waiting on it.
 
     Returns:
         - List of dicts with rows
+
+    Results are served from RESULT_CACHE until new data is ingested.
+    """
+    return fetch_data_page(params, deadline)["data"]
+
+def fetch_data_page(params, deadline=None):
+    """
+    Same as fetch_data() but returns {"data": rows, "next_cursor": token}.
+    next_cursor is None once the last page has been returned, and for
+    sorted or offset pages, which are paged with offset instead.
+    """
+    params = normalize_params(params, DATA_PARAM_KEYS, NPDES_COLUMNS)
+    source = npdes_source()
+    return RESULT_CACHE.get(
+        NPDES_TABLE_REF,
+        params,
+        lambda load_deadline: _query_data(params, source, load_deadline),
+        _npdes_version(source),
+        deadline,
+    )
+
+async def fetch_data_page_async(params, deadline=None, disconnected=None):
+    """
+    Same as fetch_data_page() for asyncio callers. No thread is held while
+    the BigQuery job runs. Identical concurrent requests, async or not,
+    share one job, which is cancelled once every request waiting on it has
+    passed its deadline or disconnected() reported that its client went away.
+    """
+    params = normalize_params(params, DATA_PARAM_KEYS, NPDES_COLUMNS)
+    source = await asyncio.to_thread(npdes_source)
+    version = await asyncio.to_thread(_npdes_version, source)
+    return await RESULT_CACHE.get_async(
+        NPDES_TABLE_REF,
+        params,
+        lambda load_deadline: _query_data_async(params, source, load_deadline),
+        version,
+        deadline,
+        disconnected,
+    )
+
+async def _query_data_async(params, source, deadline):
+    sql, job_config = _build_data_query(params, source)
+    query_job = await CLIENT.query_async(sql, job_config=job_config)
+    rows = await await_job(query_job, deadline)
+    table = await asyncio.to_thread(RESULT_READER.to_arrow, query_job, rows, _row_order(params, DATA_ORDER))
+    return await asyncio.to_thread(_data_page, table, params)
+
+def stream_data(params, deadline=None):
+    """
+    Same as fetch_data() but returns an iterator that yields row dicts page by
+    page, so large results never need to be held in memory at once.
+    The query runs before this returns, so errors surface to the caller.
+    """
+    params = normalize_params(params, DATA_PARAM_KEYS, NPDES_COLUMNS)
+    source = npdes_source()
+    cached = RESULT_CACHE.peek(NPDES_TABLE_REF, params, _npdes_version(source))
+    if cached is not None:
+        return iter(cached["data"])
+    sql, job_config = _build_data_query(params, source)
+    return _stream_rows(sql, job_config, deadline, exclude=PAGE_COLUMNS)
+
+def fetch_data_arrow(params, deadline=None):
+    """
+    Same as fetch_data() but returns (table, next_cursor), where table is a
+    typed pyarrow.Table built from the BigQuery result's Arrow form, with
+    monitoring_period_date as a DATE.
+    """
+    params = normalize_params(params, DATA_PARAM_KEYS, NPDES_COLUMNS)
+    source = npdes_source()
+    return RESULT_CACHE.get(
+        NPDES_TABLE_REF,
+        {**params, "format": "arrow"},
+        lambda load_deadline: _query_data_arrow(params, source, load_deadline),
+        _npdes_version(source),
+        deadline,
+    )
+
+def export_data(params, deadline=None):
+    """
+    Reads every row matching the fetch_data() filters, with no limit, for
+    a file export. fields and sort are honoured; limit, cursor and offset
+    are ignored.
+
+    Returns an iterator of typed pyarrow Tables of up to EXPORT_CHUNK_ROWS
+    rows, in order, read from the query's result table EXPORT_STREAMS
+    slices at a time (see read_parallel()). The query runs before this
+    returns, so errors surface to the caller; only the deadline bounds it.
+    """
+    params = normalize_params(params, DATA_FILTER_KEYS, NPDES_COLUMNS)
+    sql, job_config = _build_export_query(params, npdes_source())
+    query_job = CLIENT.query(sql, job_config=job_config)
+    total_rows = wait_for_job(query_job, deadline).total_rows
+    destination = CLIENT.get_table(query_job.destination)
+
+    def read_range(start, count):
+        rows = CLIENT.list_rows(destination, start_index=start, max_results=count)
+        return _parse_arrow_dates(rows.to_arrow(create_bqstorage_client=False), NPDES_DATE_FORMATS)
+
+    return read_parallel(read_range, total_rows, EXPORT_CHUNK_ROWS, EXPORT_STREAMS)
+
+def _build_export_query(params, source):
+    """Returns (sql, job_config) selecting all matching rows, in order."""
+    where_clauses, query_params = _data_filters(params, source)
+    order_sql = _order_sql(params.get("sort"), _sort_columns(source), "_page_date, _page_key")
+    sql = f"""
+    SELECT
+        {_select_sql(params["fields"], NPDES_COLUMNS)}
+    FROM ({_keyed_rows_sql(source, where_clauses)})
+    ORDER BY {order_sql}
+    """
+
+    job_config = bigquery.QueryJobConfig(query_parameters=query_params)
+    return sql, job_config
+
+def _query_data(params, source, deadline=None):
+    table = _read_arrow(*_build_data_query(params, source), deadline, _row_order(params, DATA_ORDER))
+    return _data_page(table, params)
+
+def _data_page(table, params):
+    """Builds the {"data", "next_cursor"} page from a data query's Arrow result."""
+    table, next_cursor = _split_cursor(table, params)
+    return {"data": rows_from_arrow(table), "next_cursor": next_cursor}
+
+def _query_data_arrow(params, source, deadline=None):
+    table = _query_arrow(
+        *_build_data_query(params, source), NPDES_DATE_FORMATS, deadline, _row_order(params, DATA_ORDER)
+    )
+    return _split_cursor(table, params)
+
+def _split_cursor(table, params):
+    """
+    Drops the keyset columns from a data query result and returns
+    (table, next_cursor); next_cursor is None when the page is not full or
+    is not in keyset order.
+    """
+    next_cursor = None
+    keyset = not params.get("sort") and not params.get("offset")
+    if keyset and table.num_rows and table.num_rows >= params["limit"]:
+        next_cursor = encode_cursor(
+            table.column("_page_date")[-1].as_py(), table.column("_page_key")[-1].as_py()
+        )
+    return table.drop_columns([name for name in PAGE_COLUMNS if name in table.column_names]), next_cursor
+
+def fetch_data_stats(params, group_by=None):
+    """
+    Summarizes dmr_value over every row matching the fetch_data() filters,
+    aggregated in BigQuery so the full series is covered regardless of limit.
+
+    group_by: optional list of "outfall", "parameter", "month"
+
+    Returns:
+        - List of dicts, one per group, with the group values plus count,
+          min, mean, median, max, std, variance, kurtosis and skewness
+    """
+    source = npdes_source()
+    groups = {
+        name: expr.format(date_sql=source["date_sql"])
+        for name, expr in _stats_groups(group_by, NPDES_STATS_GROUPS).items()
+    }
+    key = {key: params.get(key) or None for key in DATA_FILTER_KEYS}
+    key["stats"] = list(groups)
+    where_clauses, query_params = _data_filters(params, source)
+    return RESULT_CACHE.get(
+        NPDES_TABLE_REF,
+        key,
+        lambda _: _query_stats(
+            source["table_ref"], "SAFE_CAST(dmr_value AS FLOAT64)", where_clauses, query_params, groups
+        ),
+        _npdes_version(source),
+    )
+
+def fetch_data_series(params, bucket=None, points=None):
+    """
+    Returns a downsampled dmr_value series for charts, over every row
+    matching the fetch_data() filters.
+
+    bucket: "day", "week" or "month" - one row per bucket with
+        monitoring_period_date (bucket start), dmr_value (mean),
+        dmr_value_min, dmr_value_max and count
+    points: point budget for shape-preserving LTTB sampling - rows with
+        monitoring_period_date and dmr_value
+    """
+    mode = _series_mode(bucket, points)
+    key = {key: params.get(key) or None for key in DATA_FILTER_KEYS}
+    key["series"] = mode
+    source = npdes_source()
+    where_clauses, query_params = _data_filters(params, source)
+    return RESULT_CACHE.get(
+        NPDES_TABLE_REF,
+        key,
+        lambda _: _query_series(
+            source["table_ref"], source["date_sql"], "SAFE_CAST(dmr_value AS FLOAT64)",
+            where_clauses, query_params, mode, "monitoring_period_date", "dmr_value",
+        ),
+        _npdes_version(source),
+    )
+
+def fetch_data_with_weather(params, lookback_days=DEFAULT_LOOKBACK_DAYS, station_id=None):
+    """
+    Returns NPDES readings matching the fetch_data() filters, each aligned
+    with the precipitation that fell in the lookback_days before its
+    monitoring date (the monitoring date itself is not counted). The join and the window sums run in BigQuery.
+
+    station_id: weather station to use; when None, daily precipitation is
+        averaged across stations first
+
+    Returns:
+        - List of dicts with monitoring_period_date, dmr_value, outfall_number,
+          parameter_description, statistical_base, dmr_value_unit,
+          prcp_inches (sum over the window) and weather_days (days with data)
+    """
+    lookback_days = int(lookback_days or DEFAULT_LOOKBACK_DAYS)
+    if not 1 <= lookback_days <= MAX_LOOKBACK_DAYS:
+        raise ValueError(f"lookback_days must be between 1 and {MAX_LOOKBACK_DAYS}")
+    params = normalize_params(params, DATA_FILTER_KEYS)
+    # "window" keeps results of the old window, which counted the monitoring
+    # date itself, from being served out of the disk cache
+    key = {**params, "lookback_days": lookback_days, "station_id": station_id or None, "window": "before"}
+    source = npdes_source()
+    return RESULT_CACHE.get(
+        DATA_WITH_WEATHER_NAMESPACE,
+        key,
+        lambda _: _query_data_with_weather(params, lookback_days, station_id, source),
+        _npdes_version(source) + [fetch_watermark(WEATHER_TABLE_REF)],
+    )
+
+def _query_data_with_weather(params, lookback_days, station_id, source):
+    where_clauses, query_params = _data_filters(params, source)
+    where_clauses.append(f"{source['date_sql']} IS NOT NULL")
+    query_params.append(bigquery.ScalarQueryParameter("limit", "INT64", params["limit"]))
+    query_params.append(bigquery.ScalarQueryParameter("lookback_days", "INT64", lookback_days))
+
+    weather_where = ""
+    if station_id:
+        weather_where = "AND station_id = @station_id"
+        query_params.append(bigquery.ScalarQueryParameter("station_id", "STRING", station_id))
+
+    # Readings are cut to the limit first so the range join only touches
+    # the weather days those readings need. They are then numbered, since the
+    # join is grouped back to one row per reading and (date, key) alone may
+    # not tell two readings apart.
+    sql = f"""
+    WITH limited_readings AS (
+        SELECT
+            {source['date_sql']} AS reading_date,
+            _page_key AS reading_key,
+            monitoring_period_date,
+            SAFE_CAST(dmr_value AS FLOAT64) AS dmr_value,
+            outfall_number,
+            parameter_description,
+            statistical_base,
+            dmr_value_unit
+        FROM ({_keyed_rows_sql(source, where_clauses)})
+        ORDER BY reading_date, reading_key
+        LIMIT @limit
+    ),
+    readings AS (
+        SELECT *, ROW_NUMBER() OVER (ORDER BY reading_date, reading_key) AS reading_number
+        FROM limited_readings
+    ),
+    daily_weather AS (
+        SELECT date, AVG(SAFE_CAST(prcp_inches AS FLOAT64)) AS prcp_inches
+        FROM `{WEATHER_TABLE_REF}`
+        WHERE date >= (SELECT DATE_SUB(MIN(reading_date), INTERVAL @lookback_days DAY) FROM readings)
+            AND date < (SELECT MAX(reading_date) FROM readings)
+            {weather_where}
+        GROUP BY date
+    )
+    SELECT
+        ANY_VALUE(r.monitoring_period_date) AS monitoring_period_date,
+        ANY_VALUE(r.dmr_value) AS dmr_value,
+        ANY_VALUE(r.outfall_number) AS outfall_number,
+        ANY_VALUE(r.parameter_description) AS parameter_description,
+        ANY_VALUE(r.statistical_base) AS statistical_base,
+        ANY_VALUE(r.dmr_value_unit) AS dmr_value_unit,
+        SUM(w.prcp_inches) AS prcp_inches,
+        COUNT(w.date) AS weather_days
+    FROM readings r
+    LEFT JOIN daily_weather w
+        ON w.date >= DATE_SUB(r.reading_date, INTERVAL @lookback_days DAY)
+        AND w.date < r.reading_date
+    GROUP BY r.reading_number
+    ORDER BY r.reading_number
+    """
+
+    job_config = bigquery.QueryJobConfig(query_parameters=query_params)
+    return rows_from_arrow(_read_arrow(sql, job_config))
+
+def _data_filters(params, source):
+    """
+    Returns (where_clauses, query_params) for the NPDES filter params,
+    written against the given source (see npdes_source()).
     """
-    table_ref = f"{PROJECT_ID}.{DATASET}.{TABLE}"
     where_clauses = []
     query_params = []
 
@@ -64,66 +666,69 @@ def fetch_data(params):
 
     # Date filters (convert MM/DD/YYYY to DATE for comparison)
     if params.get("start_date"):
-        where_clauses.append("PARSE_DATE('%m/%d/%Y', monitoring_period_date) >= @start_date")
+        where_clauses.append(f"{source['date_sql']} >= @start_date")
         query_params.append(bigquery.ScalarQueryParameter("start_date", "DATE", params["start_date"]))
 
     if params.get("end_date"):
-        where_clauses.append("PARSE_DATE('%m/%d/%Y', monitoring_period_date) <= @end_date")
+        where_clauses.append(f"{source['date_sql']} <= @end_date")
         query_params.append(bigquery.ScalarQueryParameter("end_date", "DATE", params["end_date"]))
 
+    return where_clauses, query_params
+
+def _keyed_rows_sql(source, where_clauses):
+    """
+    Subquery of the source's rows matching where_clauses, with their
+    keyset position as _page_date and _page_key. The raw table's key is
+    numbered by a window function, so filters on it go outside.
+    """
     where_sql = ""
     if where_clauses:
         where_sql = "WHERE " + " AND ".join(where_clauses)
+    return f"""
+        SELECT
+            *,
+            {source["page_date_sql"]} AS _page_date,
+            {source["page_key_sql"]} AS _page_key
+        FROM `{source["table_ref"]}`
+        {where_sql}
+    """
 
-    # Limit
-    limit = params.get("limit", 1000)
-    query_params.append(bigquery.ScalarQueryParameter("limit", "INT64", limit))
+def _build_data_query(params, source):
+    """Returns (sql, job_config) for the NPDES data query."""
+    where_clauses, query_params = _data_filters(params, source)
+
+    # Keyset pagination: only rows after the cursor position
+    cursor_sql = ""
+    if params.get("cursor"):
+        cursor_date, cursor_key = decode_cursor(params["cursor"])
+        cursor_sql = "WHERE _page_date > @cursor_date OR (_page_date = @cursor_date AND _page_key > @cursor_key)"
+        query_params.append(bigquery.ScalarQueryParameter("cursor_date", "DATE", cursor_date))
+        query_params.append(bigquery.ScalarQueryParameter("cursor_key", "INT64", cursor_key))
 
     # Final SQL
     sql = f"""
     SELECT
-        monitoring_period_date,
-        SAFE_CAST(dmr_value AS FLOAT64) AS dmr_value,
-        outfall_number,
-        parameter_description,
-        statistical_base,
-        dmr_value_unit,
-        npdes_permit_number,
-        dmr_comments,
-        source_file_name,
-        ingestion_timestamp
-    FROM `{table_ref}`
-    {where_sql}
-    ORDER BY PARSE_DATE('%m/%d/%Y', monitoring_period_date)
-    LIMIT @limit
+        {_select_sql(params["fields"], NPDES_COLUMNS)},
+        _page_date,
+        _page_key
+    FROM ({_keyed_rows_sql(source, where_clauses)})
+    {cursor_sql}
+    ORDER BY {_order_sql(params.get("sort"), _sort_columns(source), "_page_date, _page_key")}
+    {_page_sql(params, query_params)}
     """
 
-    # Execute query
     job_config = bigquery.QueryJobConfig(query_parameters=query_params)
-    query_job = CLIENT.query(sql, job_config=job_config)
-    rows = []
-
-    for row in query_job.result():
-        rows.append({
-            "monitoring_period_date": row.monitoring_period_date,
-            "dmr_value": row.dmr_value,
-            "outfall_number": row.outfall_number,
-            "parameter_description": row.parameter_description,
-            "statistical_base": row.statistical_base,
-            "dmr_value_unit": row.dmr_value_unit,
-            "npdes_permit_number": row.npdes_permit_number,
-            "dmr_comments": row.dmr_comments,
-            "source_file_name": row.source_file_name,
-            "ingestion_timestamp": row.ingestion_timestamp.isoformat() if row.ingestion_timestamp else None
-        })
-
-    return rows
+    return sql, job_config
 
 def fetch_weather_filters():
     """
     Returns unique values for dropdowns in the precipitation_weather table.
+    Served from FILTER_CACHE until new data is ingested.
     """
-    table_ref = f"{PROJECT_ID}.{DATASET}.precipitation_weather"
+    return _versioned_filters("weather_filters", weather_version(), _query_weather_filters)
+
+def _query_weather_filters():
+    table_ref = WEATHER_TABLE_REF
 
     queries = {
         "station_ids": f"SELECT DISTINCT station_id FROM `{table_ref}` WHERE station_id IS NOT NULL ORDER BY station_id",
@@ -139,16 +744,127 @@ def fetch_weather_filters():
     return result
 
 
-def fetch_weather_data(params):
+def fetch_weather_data(params, deadline=None):
     """
     Fetches weather data from BigQuery with dynamic filters.
 
     params: dict with keys
         - station_id (str)
         - parent_facility_id (str)
+        - start_date (YYYY-MM-DD string)
+        - end_date (YYYY-MM-DD string)
         - limit (int)
+        - fields (list or comma-separated str of WEATHER_COLUMNS; default all)
+        - sort, offset (as for fetch_data(), with WEATHER_COLUMNS)
+
+    deadline: optional Deadline, as for fetch_data()
+
+    Rows are ordered by date unless sorted. Results are served from RESULT_CACHE until
+    new data is ingested.
+    """
+    params = normalize_params(params, WEATHER_PARAM_KEYS, WEATHER_COLUMNS)
+    return RESULT_CACHE.get(
+        WEATHER_TABLE_REF,
+        params,
+        lambda load_deadline: _query_weather_data(params, load_deadline),
+        fetch_watermark(WEATHER_TABLE_REF),
+        deadline,
+    )
+
+async def fetch_weather_data_async(params, deadline=None, disconnected=None):
+    """Same as fetch_weather_data() for asyncio callers; see fetch_data_page_async()."""
+    params = normalize_params(params, WEATHER_PARAM_KEYS, WEATHER_COLUMNS)
+    version = await asyncio.to_thread(fetch_watermark, WEATHER_TABLE_REF)
+    return await RESULT_CACHE.get_async(
+        WEATHER_TABLE_REF,
+        params,
+        lambda load_deadline: _query_weather_data_async(params, load_deadline),
+        version,
+        deadline,
+        disconnected,
+    )
+
+async def _query_weather_data_async(params, deadline):
+    sql, job_config = _build_weather_query(params)
+    query_job = await CLIENT.query_async(sql, job_config=job_config)
+    result = await await_job(query_job, deadline)
+    table = await asyncio.to_thread(RESULT_READER.to_arrow, query_job, result, _row_order(params, WEATHER_ORDER))
+    return await asyncio.to_thread(rows_from_arrow, table)
+
+def stream_weather_data(params, deadline=None):
+    """
+    Same as fetch_weather_data() but returns an iterator that yields row
+    dicts page by page. The query runs before this returns.
+    """
+    params = normalize_params(params, WEATHER_PARAM_KEYS, WEATHER_COLUMNS)
+    cached = RESULT_CACHE.peek(WEATHER_TABLE_REF, params, fetch_watermark(WEATHER_TABLE_REF))
+    if cached is not None:
+        return iter(cached)
+    sql, job_config = _build_weather_query(params)
+    return _stream_rows(sql, job_config, deadline)
+
+def fetch_weather_data_arrow(params, deadline=None):
+    """Same as fetch_weather_data() but returns a typed pyarrow.Table."""
+    params = normalize_params(params, WEATHER_PARAM_KEYS, WEATHER_COLUMNS)
+    return RESULT_CACHE.get(
+        WEATHER_TABLE_REF,
+        {**params, "format": "arrow"},
+        lambda load_deadline: _query_arrow(
+            *_build_weather_query(params), WEATHER_DATE_FORMATS, load_deadline, _row_order(params, WEATHER_ORDER)
+        ),
+        fetch_watermark(WEATHER_TABLE_REF),
+        deadline,
+    )
+
+def _query_weather_data(params, deadline=None):
+    table = _read_arrow(*_build_weather_query(params), deadline, _row_order(params, WEATHER_ORDER))
+    return rows_from_arrow(table)
+
+def fetch_weather_stats(params, column="prcp_inches", group_by=None):
     """
-    table_ref = f"{PROJECT_ID}.{DATASET}.precipitation_weather"
+    Summarizes one numeric weather column over every row matching the
+    fetch_weather_data() filters. Same return shape as fetch_data_stats().
+
+    group_by: optional list of "station", "month"
+    """
+    if column not in WEATHER_VALUE_COLUMNS:
+        raise ValueError(f"column must be one of {', '.join(WEATHER_VALUE_COLUMNS)}")
+    groups = _stats_groups(group_by, WEATHER_STATS_GROUPS)
+    key = {key: params.get(key) or None for key in WEATHER_PARAM_KEYS}
+    key["stats"] = [column] + list(groups)
+    where_clauses, query_params = _weather_filters(params)
+    return RESULT_CACHE.get(
+        WEATHER_TABLE_REF,
+        key,
+        lambda _: _query_stats(
+            WEATHER_TABLE_REF, f"SAFE_CAST({column} AS FLOAT64)", where_clauses, query_params, groups
+        ),
+        fetch_watermark(WEATHER_TABLE_REF),
+    )
+
+def fetch_weather_series(params, column="prcp_inches", bucket=None, points=None):
+    """
+    Same as fetch_data_series() for one numeric weather column; rows carry
+    date and the column name instead of monitoring_period_date/dmr_value.
+    """
+    if column not in WEATHER_VALUE_COLUMNS:
+        raise ValueError(f"column must be one of {', '.join(WEATHER_VALUE_COLUMNS)}")
+    mode = _series_mode(bucket, points)
+    key = {key: params.get(key) or None for key in WEATHER_PARAM_KEYS}
+    key["series"] = [column] + mode
+    where_clauses, query_params = _weather_filters(params)
+    return RESULT_CACHE.get(
+        WEATHER_TABLE_REF,
+        key,
+        lambda _: _query_series(
+            WEATHER_TABLE_REF, "date", f"SAFE_CAST({column} AS FLOAT64)",
+            where_clauses, query_params, mode, "date", column,
+        ),
+        fetch_watermark(WEATHER_TABLE_REF),
+    )
+
+def _weather_filters(params):
+    """Returns (where_clauses, query_params) for the weather filter params."""
     where_clauses = []
     query_params = []
 
@@ -161,48 +877,222 @@ def fetch_weather_data(params):
         where_clauses.append("parent_facility_id = @parent_facility_id")
         query_params.append(bigquery.ScalarQueryParameter("parent_facility_id", "STRING", params["parent_facility_id"]))
 
+    if params.get("start_date"):
+        where_clauses.append("date >= @start_date")
+        query_params.append(bigquery.ScalarQueryParameter("start_date", "DATE", params["start_date"]))
+
+    if params.get("end_date"):
+        where_clauses.append("date <= @end_date")
+        query_params.append(bigquery.ScalarQueryParameter("end_date", "DATE", params["end_date"]))
+
+    return where_clauses, query_params
+
+def _build_weather_query(params):
+    """Returns (sql, job_config) for the weather data query."""
+    table_ref = WEATHER_TABLE_REF
+    where_clauses, query_params = _weather_filters(params)
+
     where_sql = ""
     if where_clauses:
         where_sql = "WHERE " + " AND ".join(where_clauses)
 
-    # Limit
-    limit = params.get("limit", 1000)
-
+    order_sql = _order_sql(
+        params.get("sort"), WEATHER_COLUMNS, "date, station_id, parent_facility_id, ingestion_timestamp"
+    )
     sql = f"""
     SELECT
-        date,
-        SAFE_CAST(tavg_fahrenheit AS FLOAT64) AS tavg_fahrenheit,
-        SAFE_CAST(tmax_fahrenheit AS FLOAT64) AS tmax_fahrenheit,
-        SAFE_CAST(tmin_fahrenheit AS FLOAT64) AS tmin_fahrenheit,
-        SAFE_CAST(prcp_inches AS FLOAT64) AS prcp_inches,
-        SAFE_CAST(snow_inches AS FLOAT64) AS snow_inches,
-        SAFE_CAST(snwd_inches AS FLOAT64) AS snwd_inches,
-        station_id,
-        parent_facility_id,
-        source_file_name,
-        ingestion_timestamp
+        {_select_sql(params["fields"], WEATHER_COLUMNS)}
     FROM `{table_ref}`
     {where_sql}
-    LIMIT {limit}
+    ORDER BY {order_sql}
+    {_page_sql(params, query_params)}
     """
 
     job_config = bigquery.QueryJobConfig(query_parameters=query_params)
-    query_job = CLIENT.query(sql, job_config=job_config)
-    rows = []
+    return sql, job_config
+
+def _stats_groups(group_by, allowed):
+    """Returns {name: sql_expr} for the requested group_by names, in order."""
+    groups = {}
+    for name in group_by or []:
+        if name not in allowed:
+            raise ValueError(f"group_by must be among {', '.join(allowed)}")
+        groups[name] = allowed[name]
+    return groups
+
+def _query_stats(table_ref, value_sql, where_clauses, query_params, groups):
+    """
+    Computes count/min/mean/median/max/std/variance and the central moment
+    sums needed for skewness and kurtosis in a single query. Everything is
+    a grouped aggregate, so no step sorts all rows on one worker; the median
+    is APPROX_QUANTILES' 50th percentile rather than an interpolated one.
+    """
+    where_sql = ""
+    if where_clauses:
+        where_sql = "WHERE " + " AND ".join(where_clauses)
 
+    group_select = "".join(f"{expr} AS {name}, " for name, expr in groups.items())
+    group_cols = ", ".join(groups)
+    observed_cols = "".join(f"o.{name}, " for name in groups)
+    mean_group_sql = f"GROUP BY {group_cols}" if groups else ""
+    if groups:
+        join_sql = "JOIN means m ON " + " AND ".join(
+            f"o.{name} IS NOT DISTINCT FROM m.{name}" for name in groups
+        )
+        group_sql = "GROUP BY " + observed_cols.rstrip(", ") + " ORDER BY " + observed_cols.rstrip(", ")
+    else:
+        join_sql = "CROSS JOIN means m"
+        group_sql = ""
+
+    sql = f"""
+    WITH observed AS (
+        SELECT {group_select}{value_sql} AS stat_value
+        FROM `{table_ref}`
+        {where_sql}
+    ),
+    means AS (
+        SELECT {group_cols + "," if groups else ""} AVG(stat_value) AS stat_mean
+        FROM observed
+        WHERE stat_value IS NOT NULL
+        {mean_group_sql}
+    )
+    SELECT {observed_cols}
+        COUNT(*) AS n,
+        ANY_VALUE(m.stat_mean) AS mean,
+        APPROX_QUANTILES(o.stat_value, 100)[OFFSET(50)] AS median,
+        MIN(o.stat_value) AS minimum,
+        MAX(o.stat_value) AS maximum,
+        STDDEV_SAMP(o.stat_value) AS std,
+        VAR_SAMP(o.stat_value) AS variance,
+        SUM(POW(o.stat_value - m.stat_mean, 2)) AS m2,
+        SUM(POW(o.stat_value - m.stat_mean, 3)) AS m3,
+        SUM(POW(o.stat_value - m.stat_mean, 4)) AS m4
+    FROM observed o
+    {join_sql}
+    WHERE o.stat_value IS NOT NULL
+    {group_sql}
+    """
+
+    job_config = bigquery.QueryJobConfig(query_parameters=query_params)
+    query_job = CLIENT.query(sql, job_config=job_config)
+    results = []
     for row in query_job.result():
-        rows.append({
-            "date": row.date,
-            "tavg_fahrenheit": row.tavg_fahrenheit,
-            "tmax_fahrenheit": row.tmax_fahrenheit,
-            "tmin_fahrenheit": row.tmin_fahrenheit,
-            "prcp_inches": row.prcp_inches,
-            "snow_inches": row.snow_inches,
-            "snwd_inches": row.snwd_inches,
-            "station_id": row.station_id,
-            "parent_facility_id": row.parent_facility_id,
-            "source_file_name": row.source_file_name,
-            "ingestion_timestamp": row.ingestion_timestamp.isoformat() if row.ingestion_timestamp else None
-        })
-
-    return rows
+        if not row.n:
+            continue
+        result = {name: row[name] for name in groups}
+        result.update(summarize(
+            row.n, row.mean, row.median, row.minimum, row.maximum,
+            row.std, row.variance, row.m2, row.m3, row.m4,
+        ))
+        results.append(result)
+    return results
+
+def _series_mode(bucket, points):
+    """Validates the downsampling options; returns ["bucket", part] or ["points", n]."""
+    if bucket:
+        if bucket not in SERIES_BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(SERIES_BUCKETS)}")
+        return ["bucket", bucket]
+    points = int(points or 0)
+    if points < 3:
+        raise ValueError("points must be at least 3")
+    return ["points", points]
+
+def _query_series(table_ref, date_sql, value_sql, where_clauses, query_params, mode, date_name, value_name):
+    """
+    Runs either a DATE_TRUNC bucket aggregation or a two-column scan that is
+    then reduced to the point budget with LTTB.
+    """
+    where_clauses = where_clauses + [f"{date_sql} IS NOT NULL", f"{value_sql} IS NOT NULL"]
+    where_sql = "WHERE " + " AND ".join(where_clauses)
+    job_config = bigquery.QueryJobConfig(query_parameters=query_params)
+
+    if mode[0] == "bucket":
+        sql = f"""
+        SELECT
+            DATE_TRUNC({date_sql}, {SERIES_BUCKETS[mode[1]]}) AS bucket_start,
+            AVG({value_sql}) AS mean_value,
+            MIN({value_sql}) AS min_value,
+            MAX({value_sql}) AS max_value,
+            COUNT(*) AS n
+        FROM `{table_ref}`
+        {where_sql}
+        GROUP BY bucket_start
+        ORDER BY bucket_start
+        """
+        query_job = CLIENT.query(sql, job_config=job_config)
+        return [
+            {
+                date_name: row.bucket_start.isoformat(),
+                value_name: row.mean_value,
+                f"{value_name}_min": row.min_value,
+                f"{value_name}_max": row.max_value,
+                "count": row.n,
+            }
+            for row in query_job.result()
+        ]
+
+    sql = f"""
+    SELECT {date_sql} AS point_date, {value_sql} AS point_value
+    FROM `{table_ref}`
+    {where_sql}
+    ORDER BY point_date
+    """
+    query_job = CLIENT.query(sql, job_config=job_config)
+    series = [
+        (row.point_date.toordinal(), row.point_value, row.point_date)
+        for row in query_job.result()
+    ]
+    return [
+        {date_name: point_date.isoformat(), value_name: value}
+        for _, value, point_date in lttb(series, mode[1])
+    ]
+
+def _run_query(sql, job_config=None, deadline=None, **result_kwargs):
+    """
+    Runs a query and returns its row iterator. With a deadline, the job is
+    cancelled and DeadlineExceeded raised if it is still running when the
+    deadline passes.
+    """
+    query_job = CLIENT.query(sql, job_config=job_config)
+    return wait_for_job(query_job, deadline, **result_kwargs)
+
+def _read_arrow(sql, job_config=None, deadline=None, order_by=None):
+    """
+    Runs a query like _run_query() and returns its result as a pyarrow
+    Table, read by RESULT_READER (order_by: see ResultReader.to_arrow()).
+    """
+    query_job = CLIENT.query(sql, job_config=job_config)
+    result = wait_for_job(query_job, deadline)
+    return RESULT_READER.to_arrow(query_job, result, order_by)
+
+def _row_order(params, default_order):
+    """default_order unless the rows are sorted by the sort param."""
+    return None if params.get("sort") else default_order
+
+def _query_arrow(sql, job_config, date_formats, deadline=None, order_by=None):
+    return _parse_arrow_dates(_read_arrow(sql, job_config, deadline, order_by), date_formats)
+
+def _parse_arrow_dates(table, date_formats):
+    """Converts string date columns to date32 using each column's format."""
+    for name, fmt in date_formats.items():
+        index = table.schema.get_field_index(name)
+        if index < 0 or not pa.types.is_string(table.schema.field(index).type):
+            continue
+        parsed = pc.strptime(table.column(index), format=fmt, unit="s", error_is_null=True)
+        table = table.set_column(index, name, parsed.cast(pa.date32()))
+    return table
+
+def _stream_rows(sql, job_config, deadline=None, exclude=()):
+    """
+    Runs a query and waits for it to finish (at most until deadline), then
+    returns a generator of row dicts that converts one result page at a time
+    from Arrow (see rows_from_arrow()), leaving out the exclude columns.
+    """
+    result = _run_query(sql, job_config, deadline, page_size=STREAM_PAGE_SIZE)
+
+    def rows():
+        for batch in result.to_arrow_iterable():
+            yield from rows_from_arrow(batch, exclude)
+
+    return rows()
@@ -0,0 +1,388 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class RefreshingCache:
+    """
+    Small in-memory cache with stale-while-revalidate semantics.
+
+    A fresh entry (younger than ttl seconds) is returned as-is. A stale entry
+    is still returned immediately, and a single background thread is started
+    to reload it. Only a cold miss blocks, and concurrent cold misses for the
+    same key share one load.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}        # key -> (value, loaded_at)
+        self._load_locks = {}     # key -> lock held during a cold load
+        self._refreshing = set()  # keys with a background refresh running
+        self._retry_at = {}       # key -> earliest retry after a failed refresh
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_error = None
+
+    def get(self, key, loader):
+        """Returns the cached value for key, calling loader() when needed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                if time.monotonic() - loaded_at < self.ttl:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    self._start_refresh(key, loader)
+                return value
+            self.misses += 1
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another request may have finished the load while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            value = loader()
+            with self._lock:
+                self._entries[key] = (value, time.monotonic())
+                # Later misses find the entry; nobody needs the lock again
+                self._load_locks.pop(key, None)
+            return value
+
+    def invalidate(self, key=None):
+        """Drops one key, or every key when none is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._load_locks.clear()
+                self._retry_at.clear()
+            else:
+                self._entries.pop(key, None)
+                self._load_locks.pop(key, None)
+                self._retry_at.pop(key, None)
+
+    def stats(self):
+        """Returns hit/miss counters and the age of each cached key."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "last_error": self.last_error,
+                "entries": {
+                    key: {"age_seconds": round(now - loaded_at, 3)}
+                    for key, (_, loaded_at) in self._entries.items()
+                },
+            }
+
+    def _start_refresh(self, key, loader):
+        # Caller holds self._lock
+        if key in self._refreshing or time.monotonic() < self._retry_at.get(key, 0):
+            return
+        self._refreshing.add(key)
+        thread = threading.Thread(target=self._refresh, args=(key, loader), daemon=True)
+        thread.start()
+
+    def _refresh(self, key, loader):
+        try:
+            value = loader()
+            with self._lock:
+                self._entries[key] = (value, time.monotonic())
+                self._retry_at.pop(key, None)
+                self.refreshes += 1
+        except Exception as e:
+            # Keep serving the stale value and back off for one ttl
+            with self._lock:
+                self._retry_at[key] = time.monotonic() + self.ttl
+                self.refresh_errors += 1
+                self.last_error = str(e)
+            print("Error refreshing cache key", key, ":", e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+class ResultCache:
+    """
+    Two-tier cache for query results, keyed on a normalized params dict.
+
+    Tier one is an in-process LRU bounded by the pickled size of its values.
+    Tier two is a directory of pickle files on local disk, so every worker
+    process on the host shares results; when disk_max_bytes is given, the
+    least recently used files are deleted to keep it under that size.
+    Entries belong to a version (the
+    table's ingestion watermark); when the version changes, older entries
+    are dropped instead of expiring on a timer.
+
+    When a SingleFlight is given, concurrent misses for the same key and
+    version share one loader call.
+    """
+
+    def __init__(self, max_bytes, disk_dir=None, flights=None, disk_max_bytes=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.flights = flights
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()  # digest -> (value, size, namespace)
+        self._memory_bytes = 0
+        self._disk_bytes = None       # size at the last disk scan plus our writes since
+        self._versions = {}           # namespace -> current version digest
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def get(self, namespace, key, loader, version, deadline=None):
+        """
+        Returns the cached value for key, calling loader(deadline) on a miss.
+
+        namespace groups keys that share a version, e.g. one per table.
+        deadline: the caller's Deadline, or None. With a SingleFlight the
+            caller stops waiting when it passes, and loader is given the
+            SharedDeadline of every caller waiting on the same load instead
+            (see SingleFlight.do).
+        """
+        value = self._lookup(namespace, key, version)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            self.misses += 1
+
+        def load(load_deadline):
+            value = loader(load_deadline)
+            self.put(namespace, key, value, version)
+            return value
+
+        if self.flights is None:
+            return load(deadline)
+        flight_key = _digest({"namespace": namespace, "version": version, "key": key})
+        return self.flights.do(flight_key, load, deadline)
+
+    async def get_async(self, namespace, key, loader, version, deadline=None, disconnected=None):
+        """
+        get() for asyncio callers: loader is a coroutine function, and
+        concurrent misses are coalesced with get() callers on the same key
+        (see SingleFlight.do_async()). Lookups and stores run in threads.
+        """
+        value = await asyncio.to_thread(self._lookup, namespace, key, version)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            self.misses += 1
+
+        async def load(load_deadline):
+            value = await loader(load_deadline)
+            await asyncio.to_thread(self.put, namespace, key, value, version)
+            return value
+
+        if self.flights is None:
+            return await load(deadline)
+        flight_key = _digest({"namespace": namespace, "version": version, "key": key})
+        return await self.flights.do_async(flight_key, load, deadline, disconnected)
+
+    def peek(self, namespace, key, version):
+        """Returns the cached value for key, or None without loading it."""
+        value = self._lookup(namespace, key, version)
+        return None if value is _MISSING else value
+
+    def put(self, namespace, key, value, version):
+        """Stores value for key in both tiers."""
+        version_digest = _digest(version)
+        digest = _digest({"namespace": namespace, "version": version_digest, "key": key})
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(namespace, digest, value, len(blob))
+        path = self._disk_path(namespace, version_digest, digest)
+        if path:
+            self._write_disk(path, blob)
+
+    def _lookup(self, namespace, key, version):
+        version_digest = _digest(version)
+        self._check_version(namespace, version_digest)
+        digest = _digest({"namespace": namespace, "version": version_digest, "key": key})
+
+        with self._lock:
+            entry = self._memory.get(digest)
+            if entry is not None:
+                self._memory.move_to_end(digest)
+                self.memory_hits += 1
+                return entry[0]
+
+        path = self._disk_path(namespace, version_digest, digest)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    blob = f.read()
+                value = pickle.loads(blob)
+                with self._lock:
+                    self.disk_hits += 1
+                _touch(path)
+                self._remember(namespace, digest, value, len(blob))
+                return value
+            except Exception as e:
+                # Treat an unreadable file as a miss; put() rewrites it
+                print("Error reading result cache file", path, ":", e)
+        return _MISSING
+
+    def clear(self):
+        """Drops the memory tier and every file in the disk tier."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._versions.clear()
+            self._disk_bytes = None
+        if self.disk_dir:
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def stats(self):
+        """Returns hit/miss counters and the current size of each tier."""
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "memory_bytes": self._memory_bytes,
+                "memory_entries": len(self._memory),
+                "disk_dir": self.disk_dir,
+                "disk_max_bytes": self.disk_max_bytes,
+                "disk_bytes": self._disk_bytes,
+                "disk_evictions": self.disk_evictions,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "versions": dict(self._versions),
+            }
+
+    def _check_version(self, namespace, version_digest):
+        with self._lock:
+            if self._versions.get(namespace) == version_digest:
+                return
+            self._versions[namespace] = version_digest
+            # New data landed: drop this namespace's entries from memory
+            for digest, entry in list(self._memory.items()):
+                if entry[2] == namespace:
+                    del self._memory[digest]
+                    self._memory_bytes -= entry[1]
+
+        # ...and every older version directory on disk
+        if self.disk_dir:
+            namespace_dir = os.path.join(self.disk_dir, namespace)
+            try:
+                for name in os.listdir(namespace_dir):
+                    if name != version_digest:
+                        shutil.rmtree(os.path.join(namespace_dir, name), ignore_errors=True)
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, namespace, digest, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if digest in self._memory:
+                return
+            self._memory[digest] = (value, size, namespace)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted[1]
+                self.evictions += 1
+
+    def _disk_path(self, namespace, version_digest, digest):
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, namespace, version_digest, digest + ".pkl")
+
+    def _write_disk(self, path, blob):
+        # Write to a temp file and rename so other workers never read a
+        # partially written entry
+        if self.disk_max_bytes and len(blob) > self.disk_max_bytes:
+            return
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("Error writing result cache file", path, ":", e)
+            return
+        if not self.disk_max_bytes:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(blob)
+                if self._disk_bytes <= self.disk_max_bytes:
+                    return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        """
+        Deletes the least recently used files (oldest mtime; reads touch it)
+        until the disk tier fits in disk_max_bytes. Other workers write to
+        the same directory, so its size is rescanned here rather than
+        tracked, and our running estimate is reset to the result.
+        """
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith(".pkl"):
+                    continue  # another worker's write in progress
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((info.st_mtime, info.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # already evicted by another worker
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+            self.disk_evictions += removed
+
+
+# Sentinel for "not cached", since None is a valid cached value
+_MISSING = object()
+
+
+def _touch(path):
+    """Marks a disk entry as recently used for _trim_disk()."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _digest(value):
+    """Stable short hash of a JSON-serializable value."""
+    encoded = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
@@ -0,0 +1,31 @@
+import base64
+import datetime
+import json
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor token we did not issue."""
+
+
+def encode_cursor(page_date, page_key):
+    """
+    Returns an opaque token for the position after a row, given the row's
+    sort date and its stable tiebreaker key.
+    """
+    payload = {
+        "d": page_date.isoformat() if page_date else None,
+        "k": page_key,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Returns (page_date, page_key) from a token made by encode_cursor()."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        page_date = datetime.date.fromisoformat(payload["d"]) if payload["d"] else None
+        return page_date, int(payload["k"])
+    except Exception:
+        raise InvalidCursor("invalid cursor")
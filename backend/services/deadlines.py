@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's deadline passes before its query finishes."""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away while its query was running."""
+
+
+class Deadline:
+    """The point in time by which a request has to be answered."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class SharedDeadline:
+    """
+    Deadline of work that several requests wait on. It lasts as long as the
+    latest deadline among the requests still waiting, and passes as soon as
+    the last of them stops waiting, so shared work is only abandoned once
+    nobody needs its result. Requests join and leave while it runs.
+    """
+
+    def __init__(self):
+        self._waiters = {}  # token -> Deadline, or None for no deadline
+        self._lock = threading.Lock()
+        self.seconds = 0
+
+    def join(self, deadline):
+        """Adds a waiter; returns the token to leave() with."""
+        token = object()
+        with self._lock:
+            self._waiters[token] = deadline
+            self.seconds = max(self.seconds, deadline.seconds if deadline else float("inf"))
+        return token
+
+    def leave(self, token):
+        with self._lock:
+            self._waiters.pop(token, None)
+
+    def remaining(self):
+        """Seconds left for the longest-waiting request; 0 once none is left."""
+        with self._lock:
+            deadlines = list(self._waiters.values())
+        if not deadlines:
+            return 0.0
+        if None in deadlines:
+            return float("inf")
+        return max(deadline.remaining() for deadline in deadlines)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+# Longest single wait on a job before its deadline is looked at again; a
+# SharedDeadline can be extended or run out while the job runs
+JOB_POLL_SECONDS = 1.0
+
+
+def wait_for_job(query_job, deadline=None, **result_kwargs):
+    """
+    Returns query_job.result(**result_kwargs). If the job is still running
+    when deadline passes, it is cancelled and DeadlineExceeded is raised,
+    so BigQuery stops billing for a result nobody will read.
+    """
+    if deadline is None:
+        return query_job.result(**result_kwargs)
+    while not deadline.expired():
+        try:
+            return query_job.result(timeout=min(deadline.remaining(), JOB_POLL_SECONDS), **result_kwargs)
+        except TimeoutError:
+            pass
+    _cancel(query_job)
+    raise DeadlineExceeded(f"query did not finish within {deadline.seconds:g}s")
+
+
+async def await_job(query_job, deadline=None, disconnected=None, **result_kwargs):
+    """
+    Async version of wait_for_job(). The job's state is polled from the
+    event loop, so no thread is held while BigQuery runs it; threads are
+    only borrowed for the short status calls.
+
+    disconnected: optional coroutine function returning True once the
+        client has gone away, in which case the job is cancelled and
+        ClientDisconnected is raised
+    """
+    interval = 0.1
+    while not await asyncio.to_thread(query_job.done):
+        if deadline is not None and deadline.expired():
+            await asyncio.to_thread(_cancel, query_job)
+            raise DeadlineExceeded(f"query did not finish within {deadline.seconds:g}s")
+        if disconnected is not None and await disconnected():
+            await asyncio.to_thread(_cancel, query_job)
+            raise ClientDisconnected("client disconnected")
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, 1.0)
+    return await asyncio.to_thread(query_job.result, **result_kwargs)
+
+
+def _cancel(query_job):
+    try:
+        query_job.cancel()
+    except Exception as e:
+        # The job may already be done; the caller is giving up either way
+        print("Error cancelling BigQuery job", query_job.job_id, ":", e)
@@ -0,0 +1,52 @@
+def lttb(points, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    points: list of (x, y, ...) tuples sorted by x, with numeric x and y;
+        any extra fields are carried through untouched
+    threshold: number of points to keep (>= 3)
+
+    Returns a sublist of points that preserves the visual shape of the
+    series. The first and last points are always kept, and the global
+    minimum and maximum are put back if the buckets dropped them, so
+    spikes such as permit exceedances stay visible.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # index of the previously selected point
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_points = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_points) / len(next_points)
+        avg_y = sum(p[1] for p in next_points) / len(next_points)
+
+        # Pick the point in this bucket forming the largest triangle
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a][0], points[a][1]
+        best_area = -1.0
+        best = start
+        for j in range(start, end):
+            x, y = points[j][0], points[j][1]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+
+    # Keep the extremes of the full series
+    for extreme in (min(points, key=lambda p: p[1]), max(points, key=lambda p: p[1])):
+        if extreme not in sampled:
+            sampled.append(extreme)
+    sampled.sort(key=lambda p: p[0])
+    return sampled
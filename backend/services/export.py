@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from services.encoding import compress_stream
+
+# Export formats -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "csv": ("application/gzip", "csv.gz"),
+}
+
+
+def read_parallel(read_range, total_rows, chunk_rows, streams):
+    """
+    Yields a result as pyarrow Tables of up to chunk_rows rows, in order.
+    read_range(start, count) reads one slice; up to `streams` slices are
+    read at the same time, and no more than that are ever held, so memory
+    stays constant however many rows there are. At least one (possibly
+    empty) table is yielded, so writers always see the schema.
+    """
+    starts = list(range(0, total_rows, chunk_rows)) or [0]
+    executor = ThreadPoolExecutor(max_workers=streams, thread_name_prefix="export")
+    try:
+        pending = [executor.submit(read_range, start, chunk_rows) for start in starts[:streams]]
+        for start in starts[streams:] + [None] * min(streams, len(starts)):
+            table = pending.pop(0).result()
+            if start is not None:
+                pending.append(executor.submit(read_range, start, chunk_rows))
+            yield table
+    finally:
+        # Stops reading when the client goes away mid-download
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parquet_chunks(tables, compression="zstd"):
+    """
+    Writes tables into one Parquet file, a row group per table, yielding
+    the file's bytes as each row group is finished.
+    """
+    sink = _ChunkSink()
+    writer = None
+    for table in tables:
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression=compression)
+        writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+def csv_gzip_chunks(tables):
+    """
+    Writes tables as one gzip-compressed CSV file with a single header row,
+    yielding compressed bytes as they are produced.
+    """
+    def csv_chunks():
+        header = True
+        for table in tables:
+            sink = _ChunkSink()
+            pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=header))
+            header = False
+            yield sink.drain()
+
+    return compress_stream(csv_chunks(), "gzip")
+
+
+class _ChunkSink:
+    """Write-only file object whose contents are taken out with drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
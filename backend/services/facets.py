@@ -0,0 +1,60 @@
+# Selection param -> (table column, key in the /filters response)
+FACET_FIELDS = {
+    "outfall": ("outfall_number", "outfall_numbers"),
+    "parameter": ("parameter_description", "parameter_descriptions"),
+    "base": ("statistical_base", "statistical_bases"),
+    "unit": ("dmr_value_unit", "dmr_value_units"),
+}
+
+
+class FacetIndex:
+    """
+    In-memory index of every (outfall, parameter, base, unit) combination
+    present in the table, with the number of rows for each.
+
+    Built from a single GROUP BY scan so that the dropdowns can cascade
+    without going back to BigQuery.
+    """
+
+    def __init__(self, combos):
+        # combos: iterable of (outfall, parameter, base, unit, row_count)
+        self.fields = list(FACET_FIELDS)
+        self.combos = [(tuple(c[:4]), c[4]) for c in combos]
+
+    def options(self, selection=None):
+        """
+        Returns the dropdown values that remain valid for a partial selection.
+
+        Each field is narrowed by the *other* selected fields, so the current
+        choice of a dropdown never hides its own alternatives. Row counts per
+        value and the number of rows matching the full selection are included.
+        """
+        selection = {k: v for k, v in (selection or {}).items() if k in FACET_FIELDS and v}
+
+        counts = {name: {} for name in self.fields}
+        matching_rows = 0
+        for values, row_count in self.combos:
+            mismatched = [
+                name for name, value in zip(self.fields, values)
+                if name in selection and value != selection[name]
+            ]
+            if not mismatched:
+                matching_rows += row_count
+            # A combo still contributes to a field if that field is the only
+            # one disagreeing with the selection
+            for i, name in enumerate(self.fields):
+                if mismatched and mismatched != [name]:
+                    continue
+                value = values[i]
+                if value is not None:
+                    counts[name][value] = counts[name].get(value, 0) + row_count
+
+        result = {}
+        for name in self.fields:
+            key = FACET_FIELDS[name][1]
+            result[key] = sorted(counts[name])
+        result["counts"] = {
+            FACET_FIELDS[name][1]: counts[name] for name in self.fields
+        }
+        result["matching_rows"] = matching_rows
+        return result
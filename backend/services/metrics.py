@@ -0,0 +1,193 @@
+import asyncio
+import os
+import sys
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+# Seconds buckets shared by request and job latencies
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Byte buckets for response sizes, 256 B to 256 MiB
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(11))
+# Row count buckets for query results
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to produce a response (streamed bodies: until the first byte)",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Serialized response body size as sent, after compression",
+    ["route"],
+    buckets=SIZE_BUCKETS,
+)
+BIGQUERY_JOB_DURATION = Histogram(
+    "bigquery_job_duration_seconds",
+    "Time from a BigQuery job's creation to its end",
+    ["query"],
+    buckets=LATENCY_BUCKETS,
+)
+BIGQUERY_ROWS = Histogram(
+    "bigquery_rows_returned",
+    "Rows in a finished query's result",
+    ["query"],
+    buckets=ROW_BUCKETS,
+)
+BIGQUERY_JOBS = Counter(
+    "bigquery_jobs",
+    "Finished BigQuery jobs, by whether BigQuery answered from its result cache",
+    ["query", "cache_hit"],
+)
+BIGQUERY_JOB_FAILURES = Counter(
+    "bigquery_job_failures",
+    "BigQuery jobs that failed or were cancelled",
+    ["query", "reason"],
+)
+BIGQUERY_BYTES_PROCESSED = Counter(
+    "bigquery_bytes_processed", "Bytes processed by finished jobs", ["query"],
+)
+BIGQUERY_BYTES_BILLED = Counter(
+    "bigquery_bytes_billed", "Bytes billed for finished jobs", ["query"],
+)
+BIGQUERY_SLOT_MILLIS = Counter(
+    "bigquery_slot_milliseconds", "Slot time used by finished jobs", ["query"],
+)
+
+
+def observe_request(method, route, status, seconds, size=None):
+    """Records one HTTP request; size is None when not known yet"""
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+    if size is not None:
+        RESPONSE_SIZE.labels(route).observe(size)
+
+
+def counted_body(chunks, route):
+    """Passes a streamed body through, recording its size once it is sent"""
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        RESPONSE_SIZE.labels(route).observe(size)
+
+
+def metrics_payload():
+    """
+    (body, content type) of the Prometheus text exposition. When
+    PROMETHEUS_MULTIPROC_DIR is set, samples of every worker process are
+    merged.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class InstrumentedClient:
+    """
+    Wraps a bigquery.Client so every job started with query() reports its
+    duration, bytes processed and billed, slot time, cache hit and result
+    rows once it finishes. Everything else is passed to the wrapped client.
+
+    Jobs are labelled with the innermost public function of `module` that
+    started them (e.g. fetch_data_page), or, for queries run in a worker
+    thread or task, the outermost private one (e.g. _query_data), so new
+    queries are measured, and named, without any change at the call site.
+    """
+
+    def __init__(self, client, module):
+        self._client = client
+        self._module = module
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def query(self, *args, query_name=None, **kwargs):
+        name = query_name or _caller_name(self._module)
+        return MeasuredJob(self._client.query(*args, **kwargs), name)
+
+    async def query_async(self, *args, **kwargs):
+        """
+        query() run in a worker thread. The name is taken here, while the
+        calling coroutines are still on the stack.
+        """
+        name = _caller_name(self._module)
+        return await asyncio.to_thread(self.query, *args, query_name=name, **kwargs)
+
+
+class MeasuredJob:
+    """A QueryJob that records its statistics the first time result() returns"""
+
+    def __init__(self, job, query_name):
+        self._job = job
+        self._query_name = query_name
+        self._started = time.monotonic()
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._job, name)
+
+    def result(self, *args, **kwargs):
+        try:
+            result = self._job.result(*args, **kwargs)
+        except TimeoutError:
+            # Still running; the caller decides whether to cancel it
+            raise
+        except Exception:
+            self._record_failure("error")
+            raise
+        self._record(result)
+        return result
+
+    def cancel(self, *args, **kwargs):
+        cancelled = self._job.cancel(*args, **kwargs)
+        self._record_failure("cancelled")
+        return cancelled
+
+    def _record_failure(self, reason):
+        if not self._recorded:
+            self._recorded = True
+            BIGQUERY_JOB_FAILURES.labels(self._query_name, reason).inc()
+
+    def _record(self, result):
+        if self._recorded:
+            return
+        self._recorded = True
+        name = self._query_name
+        try:
+            job = self._job
+            created, ended = getattr(job, "created", None), getattr(job, "ended", None)
+            if created is not None and ended is not None:
+                seconds = (ended - created).total_seconds()
+            else:
+                seconds = time.monotonic() - self._started
+            BIGQUERY_JOB_DURATION.labels(name).observe(seconds)
+            BIGQUERY_JOBS.labels(name, str(bool(getattr(job, "cache_hit", False))).lower()).inc()
+            BIGQUERY_BYTES_PROCESSED.labels(name).inc(getattr(job, "total_bytes_processed", None) or 0)
+            BIGQUERY_BYTES_BILLED.labels(name).inc(getattr(job, "total_bytes_billed", None) or 0)
+            BIGQUERY_SLOT_MILLIS.labels(name).inc(getattr(job, "slot_millis", None) or 0)
+            if getattr(result, "total_rows", None) is not None:
+                BIGQUERY_ROWS.labels(name).observe(result.total_rows)
+        except Exception as e:
+            # Metrics must never fail a query
+            print("Error recording BigQuery job metrics:", e)
+
+
+def _caller_name(module):
+    outermost = "other"
+    frame = sys._getframe(2)
+    while frame is not None:
+        name = frame.f_code.co_name
+        if frame.f_globals.get("__name__") == module and not name.startswith("<"):
+            if not name.startswith("_"):
+                return name
+            outermost = name
+        frame = frame.f_back
+    return outermost
@@ -0,0 +1,39 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def rows_from_arrow(table, exclude=()):
+    """
+    Converts a pyarrow.Table or RecordBatch of query results into the row
+    dicts the JSON endpoints return.
+
+    Each column is converted to Python values in one bulk call, with
+    timestamps rendered as datetime.isoformat() strings by Arrow compute
+    kernels; only the final zip into dicts runs per row. Dates, floats,
+    strings and nulls come out as the same Python values BigQuery Row
+    objects hold. Columns named in exclude are left out.
+    """
+    names = [name for name in table.schema.names if name not in exclude]
+    columns = [_column_values(table.column(name)) for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def _column_values(column):
+    if pa.types.is_timestamp(column.type):
+        column = iso_timestamps(column)
+    return column.to_pylist()
+
+
+def iso_timestamps(array):
+    """
+    Formats a timestamp array exactly like datetime.isoformat(): fractional
+    seconds only when non-zero, and a +HH:MM offset for zoned timestamps.
+    """
+    zoned = array.type.tz is not None
+    text = pc.strftime(array, format="%Y-%m-%dT%H:%M:%S%z" if zoned else "%Y-%m-%dT%H:%M:%S")
+    # %S always carries the fraction; isoformat() drops an all-zero one
+    text = pc.replace_substring_regex(text, pattern=r"\.0+([+-]\d{4})?$", replacement=r"\1")
+    if zoned:
+        # %z gives +HHMM, isoformat() gives +HH:MM
+        text = pc.replace_substring_regex(text, pattern=r"([+-]\d{2})(\d{2})$", replacement=r"\1:\2")
+    return text
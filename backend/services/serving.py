@@ -0,0 +1,65 @@
+# The raw npdes_monitoring table stores monitoring_period_date as MM/DD/YYYY
+# text, so every date filter and sort has to parse it row by row and nothing
+# can be pruned. The serving table is a typed copy with a native DATE column,
+# partitioned by month and clustered by the two columns the dashboard filters
+# on most. It is a plain table rebuilt by refresh_sql() rather than a
+# materialized view, because a view cannot partition on a parsed text column.
+
+RAW_DATE_SQL = "PARSE_DATE('%m/%d/%Y', monitoring_period_date)"
+
+# Fingerprint of a row's contents, over every column
+RAW_ROW_HASH_SQL = """FARM_FINGERPRINT(TO_JSON_STRING(STRUCT(
+        npdes_permit_number, outfall_number, parameter_description, statistical_base,
+        dmr_value_unit, monitoring_period_date, dmr_value, dmr_comments,
+        source_file_name, ingestion_timestamp)))"""
+
+# Stable tiebreaker for keyset pagination, computed over the raw columns so
+# cursors mean the same thing against either table. It has to be unique:
+# rows sharing a (date, key) pair on either side of a page boundary would be
+# skipped by the > @cursor_key comparison. Exact duplicate rows (common in
+# re-ingested DMR files) share a fingerprint, so each copy is numbered
+# within its group; which copy gets which number does not matter, as they
+# are identical. Duplicates always pass the same filters, so numbering only
+# the rows a query matches gives them the same keys as the serving table.
+RAW_ROW_KEY_SQL = f"""FARM_FINGERPRINT(FORMAT('%d:%d',
+        {RAW_ROW_HASH_SQL},
+        ROW_NUMBER() OVER (PARTITION BY {RAW_ROW_HASH_SQL})))"""
+
+
+def raw_source(table_ref):
+    """Table and SQL expressions for querying npdes_monitoring directly."""
+    return {
+        "table_ref": table_ref,
+        "date_sql": RAW_DATE_SQL,
+        "page_date_sql": f"IFNULL({RAW_DATE_SQL}, DATE '0001-01-01')",
+        "page_key_sql": RAW_ROW_KEY_SQL,
+    }
+
+
+def serving_source(table_ref):
+    """Table and SQL expressions for querying the typed serving table."""
+    return {
+        "table_ref": table_ref,
+        "date_sql": "monitoring_date",
+        "page_date_sql": "IFNULL(monitoring_date, DATE '0001-01-01')",
+        "page_key_sql": "row_key",
+    }
+
+
+def refresh_sql(raw_ref, serving_ref):
+    """
+    Returns the statement that rebuilds the serving table from the raw one.
+    CREATE OR REPLACE swaps the table atomically, so readers never see a
+    partially loaded copy.
+    """
+    return f"""
+    CREATE OR REPLACE TABLE `{serving_ref}`
+    PARTITION BY DATE_TRUNC(monitoring_date, MONTH)
+    CLUSTER BY outfall_number, parameter_description
+    AS
+    SELECT
+        *,
+        SAFE.{RAW_DATE_SQL} AS monitoring_date,
+        {RAW_ROW_KEY_SQL} AS row_key
+    FROM `{raw_ref}`
+    """
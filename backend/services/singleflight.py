@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from services.deadlines import ClientDisconnected, SharedDeadline
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a caller that gave up waiting on a coalesced query."""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    The first caller for a key starts the function; callers arriving while it
+    is still running wait for that call and receive its result, or re-raise
+    its exception, instead of starting their own. The function runs in its
+    own thread (or task, for do_async()), so every caller, the first one
+    included, stops waiting at its own deadline, and it is given a
+    SharedDeadline of all the callers still waiting: one request with a short
+    timeout does not cancel a query others are still waiting on. Nothing is kept once the call finishes, so
+    this is not a cache.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout   # default seconds a caller without a deadline waits on another's call
+        self._calls = {}         # key -> _Call in flight
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def do(self, key, fn, deadline=None):
+        """
+        Returns fn(shared_deadline), or the result of the in-flight call for key.
+
+        deadline: this caller's Deadline; it stops waiting once that passes.
+            Without one, the caller that started fn() waits as long as it
+            runs, and later callers wait at most self.timeout.
+        """
+        call, leader, token = self._join(key, deadline)
+        if leader:
+            threading.Thread(target=self._run, args=(key, call, fn), daemon=True).start()
+
+        wait = self._wait_seconds(leader, deadline)
+        try:
+            return call.future.result(wait)
+        except TimeoutError:
+            if call.future.done():
+                raise  # fn() itself raised a TimeoutError
+            raise self._timed_out(deadline, wait)
+        finally:
+            call.shared.leave(token)
+
+    async def do_async(self, key, fn, deadline=None, disconnected=None):
+        """
+        do() for asyncio callers, sharing calls with do() on the same key.
+        fn is a coroutine function, started as a task on the running loop,
+        and no thread is held while waiting.
+
+        disconnected: optional coroutine function returning True once the
+            client has gone away; the caller then stops waiting and
+            ClientDisconnected is raised
+        """
+        call, leader, token = self._join(key, deadline)
+        if leader:
+            call.task = asyncio.get_running_loop().create_task(self._run_async(key, call, fn))
+
+        wait = self._wait_seconds(leader, deadline)
+        loop = asyncio.get_running_loop()
+        expires_at = None if wait is None else loop.time() + wait
+        # asyncio.wait() leaves the future running when it times out, so
+        # giving up never cancels the shared call
+        result = asyncio.wrap_future(call.future)
+        interval = 0.1
+        try:
+            while True:
+                timeout = interval if expires_at is None else max(0, min(interval, expires_at - loop.time()))
+                done, _ = await asyncio.wait({result}, timeout=timeout)
+                if done:
+                    return result.result()
+                if expires_at is not None and loop.time() >= expires_at:
+                    raise self._timed_out(deadline, wait)
+                if disconnected is not None and await disconnected():
+                    raise ClientDisconnected("client disconnected")
+                interval = min(interval * 2, 1.0)
+        finally:
+            call.shared.leave(token)
+            if not result.done():
+                # Nobody will read the outcome; keep asyncio from logging it
+                result.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def stats(self):
+        """Returns counters and the number of calls currently in flight."""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+            }
+
+    def _join(self, key, deadline):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+            # Joined under the lock, so a call never runs with nobody waiting
+            token = call.shared.join(deadline)
+        return call, leader, token
+
+    def _run(self, key, call, fn):
+        try:
+            value = fn(call.shared)
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                del self._calls[key]
+            call.future.set_exception(e)
+        else:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_result(value)
+
+    async def _run_async(self, key, call, fn):
+        try:
+            value = await fn(call.shared)
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                del self._calls[key]
+            call.future.set_exception(e)
+        else:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_result(value)
+
+    def _wait_seconds(self, leader, deadline):
+        if deadline is not None:
+            return deadline.remaining()
+        return None if leader else self.timeout
+
+    def _timed_out(self, deadline, wait):
+        with self._lock:
+            self.timeouts += 1
+        if deadline is not None:
+            return SingleFlightTimeout(f"query did not finish within {deadline.seconds:g}s")
+        return SingleFlightTimeout(f"timed out after {wait}s waiting for an identical query")
+
+
+class _Call:
+    def __init__(self):
+        self.future = Future()
+        self.shared = SharedDeadline()
+        self.task = None  # keeps do_async()'s task referenced while it runs
@@ -0,0 +1,42 @@
+import math
+
+
+def summarize(n, mean, median, minimum, maximum, std, variance, m2, m3, m4):
+    """
+    Builds the statistics dict for one group from the aggregates computed in
+    BigQuery. m2, m3 and m4 are the sums of the 2nd-4th powers of deviations
+    from the mean; skewness and kurtosis use the same bias-corrected
+    estimators as pandas Series.skew() and Series.kurt().
+    """
+    return {
+        "count": n,
+        "min": minimum,
+        "mean": mean,
+        "median": median,
+        "max": maximum,
+        "std": std,
+        "variance": variance,
+        "kurtosis": kurtosis(n, m2, m4),
+        "skewness": skewness(n, m2, m3),
+    }
+
+
+def skewness(n, m2, m3):
+    """Adjusted Fisher-Pearson skewness (G1); None below three values."""
+    if n is None or n < 3 or m2 is None or m3 is None:
+        return None
+    if m2 == 0:
+        return 0.0
+    return (n * math.sqrt(n - 1) / (n - 2)) * (m3 / m2 ** 1.5)
+
+
+def kurtosis(n, m2, m4):
+    """Bias-corrected excess kurtosis (G2); None below four values."""
+    if n is None or n < 4 or m2 is None or m4 is None:
+        return None
+    if m2 == 0:
+        return 0.0
+    adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+    numerator = n * (n + 1) * (n - 1) * m4
+    denominator = (n - 2) * (n - 3) * m2 ** 2
+    return numerator / denominator - adj
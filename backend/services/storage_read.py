@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+
+try:
+    from google.cloud import bigquery_storage
+except ImportError:  # results are read over REST when the package is missing
+    bigquery_storage = None
+
+
+def make_storage_client():
+    """
+    A BigQuery Storage Read API client, or None when the package is not
+    installed or no client can be created (e.g. missing credentials).
+    """
+    if bigquery_storage is None:
+        return None
+    try:
+        return bigquery_storage.BigQueryReadClient()
+    except Exception as e:
+        print("Storage Read API unavailable, reading results over REST:", e)
+        return None
+
+
+class ResultReader:
+    """
+    Turns finished query jobs into pyarrow Tables. Results of min_rows rows
+    or more are read with the Storage Read API in Arrow format, over up to
+    max_streams streams at once; smaller ones, and any the Storage API
+    fails on, come through the REST tabledata.list path as before.
+
+    storage_client: a google.cloud.bigquery_storage.BigQueryReadClient, or
+        anything with the same create_read_session() and read_rows()
+        methods (a local fake in tests); None always reads over REST
+    """
+
+    def __init__(self, storage_client, min_rows, max_streams):
+        self.storage_client = storage_client
+        self.min_rows = min_rows
+        self.max_streams = max_streams
+
+    def to_arrow(self, query_job, result, order_by=None):
+        """
+        query_job: the finished QueryJob
+        result: its RowIterator (query_job.result())
+        order_by: [(column, "ascending")] the query's ORDER BY, when every
+            column is in the result. Streams hold rows in no particular
+            order, so several are only read when the order can be restored
+            by sorting on these; otherwise a single stream is read.
+        """
+        if (
+            self.storage_client is None
+            or query_job.destination is None
+            or (result.total_rows or 0) < self.min_rows
+        ):
+            return result.to_arrow(create_bqstorage_client=False)
+        if order_by and not {name for name, _ in order_by} <= {field.name for field in result.schema}:
+            order_by = None
+        try:
+            return self._read_streams(query_job.destination, order_by)
+        except Exception as e:
+            print("Storage Read API failed, reading results over REST:", e)
+            return result.to_arrow(create_bqstorage_client=False)
+
+    def _read_streams(self, table, order_by):
+        requested = _read_session_request(
+            f"projects/{table.project}/datasets/{table.dataset_id}/tables/{table.table_id}"
+        )
+        session = self.storage_client.create_read_session(
+            parent=f"projects/{table.project}",
+            read_session=requested,
+            max_stream_count=self.max_streams if order_by else 1,
+        )
+        if not session.streams:
+            schema = pa.ipc.read_schema(pa.py_buffer(session.arrow_schema.serialized_schema))
+            return schema.empty_table()
+
+        def read_stream(stream):
+            return self.storage_client.read_rows(stream.name).to_arrow(session)
+
+        with ThreadPoolExecutor(max_workers=len(session.streams)) as executor:
+            table = pa.concat_tables(executor.map(read_stream, session.streams))
+        if order_by and len(session.streams) > 1:
+            # BigQuery sorts NULL first in ascending order
+            table = table.sort_by(order_by, null_placement="at_start")
+        return table
+
+
+def _read_session_request(table_path):
+    """ReadSession asking for Arrow; a plain dict for stand-in clients."""
+    if bigquery_storage is None:
+        return {"table": table_path, "data_format": "ARROW"}
+    return bigquery_storage.types.ReadSession(
+        table=table_path, data_format=bigquery_storage.types.DataFormat.ARROW
+    )
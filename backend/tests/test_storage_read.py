@@ -0,0 +1,194 @@
+"""
+ResultReader against an in-memory stand-in for the Storage Read API.
+
+Run from backend/:
+
+    python -m pytest tests
+"""
+import datetime
+import random
+
+import pyarrow as pa
+
+from services.storage_read import ResultReader
+
+
+class FakeReadClient:
+    """
+    In-memory BigQueryReadClient: serves the table registered for a
+    destination as max_stream_count streams of shuffled rows, the way the
+    real API hands out rows in no particular order.
+    """
+
+    def __init__(self, tables, fail=False):
+        self.tables = tables      # "projects/p/datasets/d/tables/t" -> pa.Table
+        self.fail = fail
+        self.sessions = []        # (parent, read_session, max_stream_count) requested
+        self.read = []            # stream names read
+        self._streams = {}
+
+    def create_read_session(self, parent, read_session, max_stream_count):
+        if self.fail:
+            raise RuntimeError("Storage Read API has not been enabled")
+        self.sessions.append((parent, read_session, max_stream_count))
+        table = self.tables[read_session["table"]]
+        if table.num_rows == 0:
+            return _FakeSession([], table.schema)
+        order = list(range(table.num_rows))
+        if max_stream_count > 1:
+            random.Random(0).shuffle(order)
+        table = table.take(order)
+        count = min(max_stream_count, table.num_rows)
+        streams = []
+        for i in range(count):
+            start, stop = i * table.num_rows // count, (i + 1) * table.num_rows // count
+            name = f"{read_session['table']}/streams/{i}"
+            self._streams[name] = table.slice(start, stop - start)
+            streams.append(_FakeStream(name))
+        return _FakeSession(streams, table.schema)
+
+    def read_rows(self, name):
+        self.read.append(name)
+        return _FakeRowsStream(self._streams[name])
+
+
+class _FakeSession:
+    def __init__(self, streams, schema):
+        self.streams = streams
+        self.arrow_schema = _FakeArrowSchema(schema.serialize().to_pybytes())
+
+
+class _FakeArrowSchema:
+    def __init__(self, serialized_schema):
+        self.serialized_schema = serialized_schema
+
+
+class _FakeStream:
+    def __init__(self, name):
+        self.name = name
+
+
+class _FakeRowsStream:
+    def __init__(self, table):
+        self.table = table
+
+    def to_arrow(self, read_session):
+        return self.table
+
+
+class _FakeTableReference:
+    def __init__(self, project, dataset_id, table_id):
+        self.project = project
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+
+
+class _FakeJob:
+    def __init__(self, destination):
+        self.destination = destination
+
+
+class _FakeField:
+    def __init__(self, name):
+        self.name = name
+
+
+class _FakeRowIterator:
+    """RowIterator for a finished query; to_arrow() is the REST path."""
+
+    def __init__(self, table):
+        self.table = table
+        self.total_rows = table.num_rows
+        self.schema = [_FakeField(name) for name in table.column_names]
+        self.rest_reads = 0
+
+    def to_arrow(self, create_bqstorage_client=True):
+        assert create_bqstorage_client is False
+        self.rest_reads += 1
+        return self.table
+
+
+DESTINATION = _FakeTableReference("proj", "_anon", "anon_results")
+DESTINATION_PATH = "projects/proj/datasets/_anon/tables/anon_results"
+ORDER_BY = [("reading_date", "ascending"), ("reading_key", "ascending")]
+
+
+def make_result(rows=40):
+    """Rows in the query's ORDER BY reading_date, reading_key, NULL dates first."""
+    dates = [None, None] + [datetime.date(2020, 1, 1) + datetime.timedelta(days=i // 3) for i in range(rows - 2)]
+    return pa.table({
+        "reading_date": pa.array(dates, pa.date32()),
+        "reading_key": pa.array(range(rows), pa.int64()),
+        "dmr_value": pa.array([float(i) for i in range(rows)]),
+    })
+
+
+def test_multiple_streams_are_read_and_sorted_back_into_order():
+    expected = make_result()
+    client = FakeReadClient({DESTINATION_PATH: expected})
+    result = _FakeRowIterator(expected)
+
+    table = ResultReader(client, min_rows=10, max_streams=4).to_arrow(_FakeJob(DESTINATION), result, ORDER_BY)
+
+    assert client.sessions == [("projects/proj", {"table": DESTINATION_PATH, "data_format": "ARROW"}, 4)]
+    assert len(client.read) == 4
+    assert result.rest_reads == 0
+    assert table.equals(expected)
+
+
+def test_without_order_by_a_single_stream_is_read():
+    expected = make_result()
+    client = FakeReadClient({DESTINATION_PATH: expected})
+
+    table = ResultReader(client, min_rows=10, max_streams=4).to_arrow(_FakeJob(DESTINATION), _FakeRowIterator(expected))
+
+    assert client.sessions[0][2] == 1
+    assert len(client.read) == 1
+    assert table.equals(expected)
+
+
+def test_order_by_on_a_column_not_in_the_result_reads_a_single_stream():
+    expected = make_result()
+    client = FakeReadClient({DESTINATION_PATH: expected})
+    order_by = [("monitoring_period_date", "ascending")]
+
+    table = ResultReader(client, min_rows=10, max_streams=4).to_arrow(_FakeJob(DESTINATION), _FakeRowIterator(expected), order_by)
+
+    assert client.sessions[0][2] == 1
+    assert table.equals(expected)
+
+
+def test_empty_session_returns_an_empty_table_with_the_schema():
+    expected = make_result().slice(0, 0)
+    client = FakeReadClient({DESTINATION_PATH: expected})
+    result = _FakeRowIterator(make_result())  # total_rows as reported before the read
+
+    table = ResultReader(client, min_rows=10, max_streams=4).to_arrow(_FakeJob(DESTINATION), result, ORDER_BY)
+
+    assert table.num_rows == 0
+    assert table.schema.equals(expected.schema)
+    assert client.read == []
+    assert result.rest_reads == 0
+
+
+def test_storage_api_failure_falls_back_to_rest():
+    expected = make_result()
+    client = FakeReadClient({DESTINATION_PATH: expected}, fail=True)
+    result = _FakeRowIterator(expected)
+
+    table = ResultReader(client, min_rows=10, max_streams=4).to_arrow(_FakeJob(DESTINATION), result, ORDER_BY)
+
+    assert result.rest_reads == 1
+    assert table.equals(expected)
+
+
+def test_small_results_are_read_over_rest():
+    expected = make_result()
+    client = FakeReadClient({DESTINATION_PATH: expected})
+    result = _FakeRowIterator(expected)
+
+    table = ResultReader(client, min_rows=1000, max_streams=4).to_arrow(_FakeJob(DESTINATION), result, ORDER_BY)
+
+    assert client.sessions == []
+    assert result.rest_reads == 1
+    assert table.equals(expected)
@@ -1,53 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from utils.api_client import get_filters, get_data, get_weather_filters, get_weather_data
+from utils.api_client import (
+    clear_cache, fetch_all, get_filters, get_data_series, get_data_stats, get_data_table_page,
+    get_weather_filters, get_weather_series, get_weather_stats, get_weather_table_page
+)
+from utils.charts import series_figure
 from datetime import datetime
+from functools import partial
 
 st.set_page_config(page_title="Environmental Data Dashboard", layout="wide")
 
-# Theme toggle in the top right
-col1, col2 = st.columns([6, 1])
-with col2:
-    # Use a button with just an icon
-    if 'theme' not in st.session_state:
-        st.session_state.theme = True  # Default to dark mode
-    
-    # Display icon based on current theme
-    icon = "🌙" if st.session_state.theme else "☀️"
-    
-    # Custom CSS for subtle icon button
-    st.markdown("""
-        <style>
-        .theme-button button {
-            background-color: transparent !important;
-            border: none !important;
-            box-shadow: none !important;
-            padding: 0 !important;
-            font-size: 20px !important;
-            opacity: 0.5 !important;
-        }
-        .theme-button button:hover {
-            opacity: 1 !important;
-            background-color: transparent !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
-    # Use markdown container for custom styling
-    with st.container():
-        st.markdown('<div class="theme-button">', unsafe_allow_html=True)
-        if st.button(icon, key="theme_toggle"):
-            st.session_state.theme = not st.session_state.theme
-            st.rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    theme = st.session_state.theme
-
-# Apply custom CSS based on theme
-if theme:
-    # Dark theme
-    st.markdown("""
+# Page CSS for the dark and light themes
+DARK_THEME_CSS = """
         <style>
         .stApp {
             background-color: #000000;
@@ -149,10 +114,9 @@ if theme:
             color: #FFFFFF !important;
         }
         </style>
-    """, unsafe_allow_html=True)
-else:
-    # Light theme
-    st.markdown("""
+    """
+
+LIGHT_THEME_CSS = """
         <style>
         .stApp {
             background-color: #FFFFFF;
@@ -254,282 +218,442 @@ else:
             color: #000000 !important;
         }
         </style>
-    """, unsafe_allow_html=True)
+    """
 
-# Load filters
-with st.spinner("Loading filter values..."):
-    filters = get_filters()
-
-if not filters:
-    st.error("Could not load filter values from backend.")
-    st.stop()
-
-# Sidebar filters
-st.sidebar.header("Filters")
-outfall_options = [""] + filters.get("outfall_numbers", [])
-
-# Add Precipitation and Temperature to parameter options
-parameter_options = [""] + filters.get("parameter_descriptions", []) + ["Precipitation", "Temperature"]
-
-selected_outfall = st.sidebar.selectbox("Outfall", outfall_options, index=0)
-selected_parameter = st.sidebar.selectbox("Parameter", parameter_options, index=0)
-
-# Dynamically adjust Statistical Base and Unit based on parameter selection
-if selected_parameter == "Precipitation":
-    # For Precipitation
-    selected_base = "Daily Total"
-    st.sidebar.text_input("Base", value=selected_base, disabled=True)
-    selected_unit = "inches"
-    st.sidebar.text_input("Unit", value=selected_unit, disabled=True)
-elif selected_parameter == "Temperature":
-    # For Temperature
-    temp_base_options = ["Daily Max", "Daily Min", "Daily Avg"]
-    selected_base = st.sidebar.selectbox("Base", temp_base_options, index=0)
-    selected_unit = "Fahrenheit"
-    st.sidebar.text_input("Unit", value=selected_unit, disabled=True)
-else:
-    # For regular NPDES parameters
-    base_options = [""] + filters.get("statistical_bases", [])
-    unit_options = [""] + filters.get("dmr_value_units", [])
-    selected_base = st.sidebar.selectbox("Base", base_options, index=0)
-    selected_unit = st.sidebar.selectbox("Unit", unit_options, index=0)
-
-# Date range inputs (optional)
-st.sidebar.markdown("### Date range")
-start_date = st.sidebar.date_input(
-    "Start date", 
-    value=None, 
-    min_value=datetime(2000, 1, 1), 
-    max_value=datetime.today(),
-    key="start_date"
-)
-end_date = st.sidebar.date_input(
-    "End date", 
-    value=None, 
-    min_value=datetime(2000, 1, 1), 
-    max_value=datetime.today(),
-    key="end_date"
-)
+if 'theme' not in st.session_state:
+    st.session_state.theme = True  # Default to dark mode
 
-# Convert to string format (YYYY-MM-DD) before passing to API
-start_date_str = start_date.strftime("%Y-%m-%d") if start_date else None
-end_date_str = end_date.strftime("%Y-%m-%d") if end_date else None
-
-if st.sidebar.button("Apply Filter"):
-    # Determine which API to call based on parameter selection
-    if selected_parameter in ["Precipitation", "Temperature"]:
-        # Fetch weather data
-        with st.spinner("Fetching weather data..."):
-            weather_data = get_weather_data(
-                station_id="USC00467342",  # Hardcoded station ID
-                parent_facility_id=None,
-                limit=5000
-            )
-
-        if weather_data is None:
-            st.error("Failed to fetch weather data.")
-            st.stop()
-
-        if len(weather_data) == 0:
-            st.info("No rows match the selected filters.")
-            st.stop()
-
-        df = pd.DataFrame(weather_data)
-
-        # Parse date column
-        if "date" in df.columns:
-            try:
-                df["date"] = pd.to_datetime(df["date"], errors="coerce")
-                df = df.sort_values("date")
-            except Exception:
-                pass
-
-        # Convert numeric columns
-        numeric_cols = ["tavg_fahrenheit", "tmax_fahrenheit", "tmin_fahrenheit", "prcp_inches", "snow_inches", "snwd_inches"]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        # Apply date filter if provided
-        if start_date and "date" in df.columns:
-            df = df[df["date"] >= pd.Timestamp(start_date)]
-        if end_date and "date" in df.columns:
-            df = df[df["date"] <= pd.Timestamp(end_date)]
-
-        if selected_parameter == "Precipitation":
-            # Plot Precipitation
-            st.subheader("Precipitation over Time")
-            if "prcp_inches" in df.columns and df["prcp_inches"].notnull().any():
-                plot_df = df.dropna(subset=["prcp_inches"])
-                
-                if "date" in plot_df.columns and not plot_df["date"].isnull().all():
-                    chart_data = plot_df.set_index("date")[["prcp_inches"]]
-                    chart_data.columns = ["Precipitation (inches)"]
-                    st.line_chart(chart_data)
-                else:
-                    st.line_chart(plot_df["prcp_inches"])
-            else:
-                st.info("No precipitation data available to plot.")
-
-            # Statistical Analysis for Precipitation
-            if "prcp_inches" in df.columns and df["prcp_inches"].notnull().any():
-                st.subheader("Statistical Analysis")
-                numeric_series = pd.to_numeric(df["prcp_inches"], errors="coerce").dropna()
-
-                if len(numeric_series) > 0:
-                    stats = {
-                        "Minimum (inches)": numeric_series.min(),
-                        "Average (inches)": numeric_series.mean(),
-                        "Median (inches)": numeric_series.median(),
-                        "Maximum (inches)": numeric_series.max(),
-                        "Standard Deviation (inches)": numeric_series.std(),
-                        "Variance (inches)": numeric_series.var(),
-                        "Kurtosis": numeric_series.kurtosis(),
-                        "Skewness": numeric_series.skew(),
-                    }
-
-                    stats_df = pd.DataFrame(stats, index=["Value"]).T
-                    st.table(stats_df)
-                else:
-                    st.info("No numeric values available for statistical analysis.")
-
-        elif selected_parameter == "Temperature":
-            # Plot Temperature based on selected base (Tmax, Tmin, Tavg)
-            st.subheader(f"Temperature ({selected_base}) over Time")
-            
-            temp_col_map = {
-                "Daily Max": "tmax_fahrenheit",
-                "Daily Min": "tmin_fahrenheit",
-                "Daily Avg": "tavg_fahrenheit"
-            }
-            
-            temp_col = temp_col_map.get(selected_base)
-            
-            if temp_col in df.columns and df[temp_col].notnull().any():
-                plot_df = df.dropna(subset=[temp_col])
-                
-                if "date" in plot_df.columns and not plot_df["date"].isnull().all():
-                    chart_data = plot_df.set_index("date")[[temp_col]]
-                    chart_data.columns = [f"{selected_base} (°F)"]
-                    st.line_chart(chart_data)
-                else:
-                    st.line_chart(plot_df[temp_col])
-            else:
-                st.info(f"No {selected_base} temperature data available to plot.")
-
-            # Statistical Analysis for Temperature
-            if temp_col in df.columns and df[temp_col].notnull().any():
-                st.subheader("Statistical Analysis")
-                numeric_series = pd.to_numeric(df[temp_col], errors="coerce").dropna()
-
-                if len(numeric_series) > 0:
-                    stats = {
-                        "Minimum (°F)": numeric_series.min(),
-                        "Average (°F)": numeric_series.mean(),
-                        "Median (°F)": numeric_series.median(),
-                        "Maximum (°F)": numeric_series.max(),
-                        "Standard Deviation (°F)": numeric_series.std(),
-                        "Variance (°F)": numeric_series.var(),
-                        "Kurtosis": numeric_series.kurtosis(),
-                        "Skewness": numeric_series.skew(),
-                    }
-
-                    stats_df = pd.DataFrame(stats, index=["Value"]).T
-                    st.table(stats_df)
-                else:
-                    st.info("No numeric values available for statistical analysis.")
-
-        # Raw data
-        st.subheader("Raw Data")
-        st.dataframe(df)
+def toggle_theme():
+    st.session_state.theme = not st.session_state.theme
 
-    else:
-        # Regular NPDES data
-        with st.spinner("Fetching data..."):
-            data = get_data(
-                outfall=selected_outfall or None,
-                parameter=selected_parameter or None,
-                base=selected_base or None,
-                unit=selected_unit or None,
-                start_date=start_date_str,
-                end_date=end_date_str,
-                limit=5000
-            )
-
-        if data is None:
-            st.error("Failed to fetch data.")
-            st.stop()
-
-        if len(data) == 0:
-            st.info("No rows match the selected filters.")
-            st.stop()
-
-        df = pd.DataFrame(data)
-
-        # Try parsing monitoring_period_date to datetime
-        if "monitoring_period_date" in df.columns:
-            try:
-                df["monitoring_period_date"] = pd.to_datetime(df["monitoring_period_date"], errors="coerce")
-            except Exception:
-                pass
-
-        # Plot DMR Value vs Date
-        if selected_parameter:
-            st.subheader(f"{selected_parameter} over Time")
+@st.fragment
+def theme_toggle():
+    """
+    Theme button plus the CSS for the current theme. It is a fragment, so
+    toggling re-renders only this part; the CSS is page-wide wherever it
+    is written, and nothing else is refetched or recomputed.
+    """
+    # Display icon based on current theme
+    icon = "🌙" if st.session_state.theme else "☀️"
+    
+    # Custom CSS for subtle icon button
+    st.markdown("""
+        <style>
+        .theme-button button {
+            background-color: transparent !important;
+            border: none !important;
+            box-shadow: none !important;
+            padding: 0 !important;
+            font-size: 20px !important;
+            opacity: 0.5 !important;
+        }
+        .theme-button button:hover {
+            opacity: 1 !important;
+            background-color: transparent !important;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    # Use markdown container for custom styling
+    with st.container():
+        st.markdown('<div class="theme-button">', unsafe_allow_html=True)
+        st.button(icon, key="theme_toggle", on_click=toggle_theme)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    # Apply custom CSS based on theme
+    st.markdown(DARK_THEME_CSS if st.session_state.theme else LIGHT_THEME_CSS, unsafe_allow_html=True)
+
+# Theme toggle in the top right
+col1, col2 = st.columns([6, 1])
+with col2:
+    theme_toggle()
+
+# Weather series offered alongside the NPDES parameters
+WEATHER_PARAMETERS = ["Precipitation", "Temperature"]
+
+# Chart resolution -> bucket for the series endpoints (None = point budget)
+CHART_RESOLUTIONS = {"Auto": None, "Daily": "day", "Weekly": "week", "Monthly": "month"}
+
+# Hardcoded weather station for the Precipitation and Temperature views
+WEATHER_STATION_ID = "USC00467342"
+
+# Columns each view shows in its raw data table; charts and stats come
+# from their own endpoints, so nothing else needs to be fetched
+NPDES_RAW_FIELDS = [
+    "monitoring_period_date", "dmr_value", "outfall_number", "parameter_description",
+    "statistical_base", "dmr_value_unit", "npdes_permit_number", "dmr_comments",
+]
+WEATHER_RAW_FIELDS = {
+    "Precipitation": ["date", "station_id", "prcp_inches", "snow_inches", "snwd_inches"],
+    "Temperature": ["date", "station_id", "tavg_fahrenheit", "tmax_fahrenheit", "tmin_fahrenheit"],
+}
+
+# Rows per page offered for the raw data tables
+RAW_PAGE_SIZES = [50, 100, 250]
+
+# Weather column charted for each Temperature base
+TEMPERATURE_COLUMNS = {
+    "Daily Max": "tmax_fahrenheit",
+    "Daily Min": "tmin_fahrenheit",
+    "Daily Avg": "tavg_fahrenheit"
+}
+
+# Applied filter selections whose results are kept in session state
+RESULTS_KEPT = 5
+
+if "results" not in st.session_state:
+    st.session_state.results = {}  # selection key -> fetched result
+
+def keep_valid_selection(key, options):
+    """Clears a selectbox value that is no longer among its options"""
+    if st.session_state.get(key) not in options:
+        st.session_state[key] = options[0]
+
+def selection_key(selection):
+    """Hashable key for a filter selection dict"""
+    return tuple(sorted(selection.items()))
+
+def npdes_filters(selection):
+    """api_client NPDES filter arguments for a selection"""
+    return {
+        "outfall": selection["outfall"],
+        "parameter": selection["parameter"],
+        "base": selection["base"],
+        "unit": selection["unit"],
+        "start_date": selection["start_date"],
+        "end_date": selection["end_date"],
+    }
+
+def weather_range(selection):
+    """api_client weather filter arguments for a selection"""
+    return {
+        "station_id": WEATHER_STATION_ID,
+        "start_date": selection["start_date"],
+        "end_date": selection["end_date"],
+    }
+
+def raw_fields(selection):
+    """Columns of the selection's raw data table; the first is its date"""
+    parameter = selection["parameter"]
+    return WEATHER_RAW_FIELDS[parameter] if parameter in WEATHER_PARAMETERS else NPDES_RAW_FIELDS
+
+def fetch_raw_page(selection, page=0, page_size=RAW_PAGE_SIZES[0], sort=None):
+    """
+    One server-side page of the selection's raw rows, sorted by date unless
+    sort is given: (DataFrame, has_next), or None on error
+    """
+    fields = raw_fields(selection)
+    sort = sort or fields[0]
+    if selection["parameter"] in WEATHER_PARAMETERS:
+        return get_weather_table_page(
+            page=page, page_size=page_size, sort=sort, fields=fields, **weather_range(selection)
+        )
+    return get_data_table_page(
+        page=page, page_size=page_size, sort=sort, fields=fields, **npdes_filters(selection)
+    )
+
+def fetch_results(selection):
+    """
+    Fetches the first raw data page, chart series and statistics for a
+    filter selection at the same time. Returns {"selection", "data",
+    "series", "stats"}; data is the first page's DataFrame.
+    """
+    parameter = selection["parameter"]
+    if parameter in WEATHER_PARAMETERS:
+        if parameter == "Precipitation":
+            weather_col = "prcp_inches"
         else:
-            st.subheader("DMR Value over Time")
-            
-        if "dmr_value" in df.columns and df["dmr_value"].notnull().any():
-            plot_df = df.dropna(subset=["dmr_value"])
-            
-            # If date is parsed, use it, otherwise use index
-            if "monitoring_period_date" in plot_df.columns and not plot_df["monitoring_period_date"].isnull().all():
-                plot_df = plot_df.sort_values("monitoring_period_date")
-                chart_data = plot_df.set_index("monitoring_period_date")[["dmr_value"]]
-                
-                # Rename column with unit if available
-                if selected_unit:
-                    chart_data.columns = [f"DMR Value ({selected_unit})"]
-                else:
-                    chart_data.columns = ["DMR Value"]
-                
-                st.line_chart(chart_data)
-            else:
-                st.line_chart(plot_df["dmr_value"])
+            weather_col = TEMPERATURE_COLUMNS.get(selection["base"])
+        page, series, stats = fetch_all(
+            partial(fetch_raw_page, selection),
+            partial(get_weather_series, column=weather_col, bucket=selection["bucket"], **weather_range(selection)),
+            partial(get_weather_stats, column=weather_col, **weather_range(selection)),
+        )
+    else:
+        page, series, stats = fetch_all(
+            partial(fetch_raw_page, selection),
+            partial(get_data_series, bucket=selection["bucket"], **npdes_filters(selection)),
+            partial(get_data_stats, **npdes_filters(selection)),
+        )
+    data = page[0] if page is not None else None
+    return {"selection": selection, "data": data, "series": series, "stats": stats}
+
+def store_result(key, result):
+    """Keeps result for key, dropping the oldest beyond RESULTS_KEPT"""
+    results = st.session_state.results
+    results.pop(key, None)
+    results[key] = result
+    while len(results) > RESULTS_KEPT:
+        results.pop(next(iter(results)))
+
+@st.fragment
+def sidebar_filters():
+    """
+    Filter widgets. As a fragment, changing a filter re-renders only the
+    sidebar; the results on the page stay as they are until Apply Filter
+    stores new ones and reruns the app.
+    """
+    # Results are reused across reruns and sessions until they expire; this
+    # drops them so everything is fetched from the backend again
+    if st.button("Refresh data", help="Reload filter values and data from the backend"):
+        clear_cache()
+        st.session_state.results.clear()
+        st.rerun()
+
+    # Current sidebar selections; the backend narrows every dropdown to the
+    # values that still have rows for the other selections
+    selected_parameter_state = st.session_state.get("filter_parameter") or None
+    if selected_parameter_state in WEATHER_PARAMETERS:
+        selected_parameter_state = None
+
+    # Load filters
+    with st.spinner("Loading filter values..."):
+        filters = get_filters(
+            outfall=st.session_state.get("filter_outfall") or None,
+            parameter=selected_parameter_state,
+            base=st.session_state.get("filter_base") or None,
+            unit=st.session_state.get("filter_unit") or None,
+        )
+
+    if not filters:
+        st.error("Could not load filter values from backend.")
+        return
+
+    st.header("Filters")
+    outfall_options = [""] + filters.get("outfall_numbers", [])
+
+    # Add Precipitation and Temperature to parameter options
+    parameter_options = [""] + filters.get("parameter_descriptions", []) + WEATHER_PARAMETERS
+
+    keep_valid_selection("filter_outfall", outfall_options)
+    keep_valid_selection("filter_parameter", parameter_options)
+    selected_outfall = st.selectbox("Outfall", outfall_options, key="filter_outfall")
+    selected_parameter = st.selectbox("Parameter", parameter_options, key="filter_parameter")
+
+    # Dynamically adjust Statistical Base and Unit based on parameter selection
+    if selected_parameter == "Precipitation":
+        # For Precipitation
+        selected_base = "Daily Total"
+        st.text_input("Base", value=selected_base, disabled=True)
+        selected_unit = "inches"
+        st.text_input("Unit", value=selected_unit, disabled=True)
+    elif selected_parameter == "Temperature":
+        # For Temperature
+        temp_base_options = list(TEMPERATURE_COLUMNS)
+        selected_base = st.selectbox("Base", temp_base_options, index=0, key="filter_temperature_base")
+        selected_unit = "Fahrenheit"
+        st.text_input("Unit", value=selected_unit, disabled=True)
+    else:
+        # For regular NPDES parameters
+        base_options = [""] + filters.get("statistical_bases", [])
+        unit_options = [""] + filters.get("dmr_value_units", [])
+        keep_valid_selection("filter_base", base_options)
+        keep_valid_selection("filter_unit", unit_options)
+        selected_base = st.selectbox("Base", base_options, key="filter_base")
+        selected_unit = st.selectbox("Unit", unit_options, key="filter_unit")
+        st.caption(f"{filters.get('matching_rows', 0):,} matching rows (before date range)")
+
+    # Date range inputs (optional)
+    st.markdown("### Date range")
+    start_date = st.date_input(
+        "Start date", 
+        value=None, 
+        min_value=datetime(2000, 1, 1), 
+        max_value=datetime.today(),
+        key="start_date"
+    )
+    end_date = st.date_input(
+        "End date", 
+        value=None, 
+        min_value=datetime(2000, 1, 1), 
+        max_value=datetime.today(),
+        key="end_date"
+    )
+
+    chart_resolution = st.selectbox("Chart resolution", list(CHART_RESOLUTIONS), index=0, key="chart_resolution")
+
+    if st.button("Apply Filter"):
+        selection = {
+            "outfall": selected_outfall or None,
+            "parameter": selected_parameter or None,
+            "base": selected_base or None,
+            "unit": selected_unit or None,
+            # Convert to string format (YYYY-MM-DD) before passing to API
+            "start_date": start_date.strftime("%Y-%m-%d") if start_date else None,
+            "end_date": end_date.strftime("%Y-%m-%d") if end_date else None,
+            "bucket": CHART_RESOLUTIONS[chart_resolution],
+        }
+        key = selection_key(selection)
+        result = st.session_state.results.get(key)
+        # A selection applied before is shown from memory; failed fetches
+        # are retried
+        if result is None or result["data"] is None:
+            with st.spinner("Fetching data..."):
+                result = fetch_results(selection)
+        store_result(key, result)
+        st.session_state.applied = key
+        st.rerun()
+
+def render_series(series, selection, date_col, value_col, label):
+    """Plots a downsampled series over the selection's date range"""
+    x_range = (selection["start_date"], selection["end_date"])
+    if not any(x_range):
+        x_range = None
+    st.plotly_chart(series_figure(series, date_col, value_col, label, x_range=x_range))
+
+def render_stats(stats, unit_str=""):
+    """Renders server-side statistics (see get_data_stats) as a table"""
+    st.subheader("Statistical Analysis")
+    if stats is None:
+        st.error("Failed to fetch statistics.")
+        return
+    if not stats:
+        st.info("No numeric values available for statistical analysis.")
+        return
+
+    summary = stats[0]
+    table = {
+        f"Minimum{unit_str}": summary["min"],
+        f"Average{unit_str}": summary["mean"],
+        f"Median{unit_str}": summary["median"],
+        f"Maximum{unit_str}": summary["max"],
+        f"Standard Deviation{unit_str}": summary["std"],
+        f"Variance{unit_str}": summary["variance"],
+        "Kurtosis": summary["kurtosis"],
+        "Skewness": summary["skewness"],
+    }
+    st.table(pd.DataFrame(table, index=["Value"]).T)
+
+def step_raw_page(step):
+    st.session_state.raw_page += step
+
+@st.fragment
+def render_raw_table(selection):
+    """
+    The selection's raw rows, one server-side page at a time; the next
+    page is prefetched by the API client. As a fragment, sorting and paging
+    re-render only the table.
+    """
+    st.subheader("Raw Data")
+    fields = raw_fields(selection)
+
+    sort_col, order_col, size_col = st.columns([3, 2, 2])
+    keep_valid_selection("raw_sort", fields)
+    with sort_col:
+        sort_column = st.selectbox("Sort by", fields, key="raw_sort")
+    with order_col:
+        descending = st.toggle("Descending", key="raw_descending")
+    with size_col:
+        page_size = st.selectbox("Rows per page", RAW_PAGE_SIZES, key="raw_page_size")
+
+    # Back to the first page whenever what is being paged changes
+    view = (selection_key(selection), sort_column, descending, page_size)
+    if st.session_state.get("raw_view") != view:
+        st.session_state.raw_view = view
+        st.session_state.raw_page = 0
+    page_number = st.session_state.raw_page
+
+    sort = ("-" if descending else "") + sort_column
+    with st.spinner("Fetching rows..."):
+        page = fetch_raw_page(selection, page_number, page_size, sort)
+    if page is None:
+        st.error("Failed to fetch rows.")
+        return
+    df, has_next = page
+    st.dataframe(df, hide_index=True)
+
+    prev_col, label_col, next_col = st.columns([1, 4, 1])
+    with prev_col:
+        st.button("Previous", key="raw_previous", disabled=page_number == 0, on_click=step_raw_page, args=(-1,))
+    with label_col:
+        first_row = page_number * page_size + 1
+        st.caption(f"Page {page_number + 1} · rows {first_row:,}–{first_row + len(df) - 1:,}")
+    with next_col:
+        st.button("Next", key="raw_next", disabled=not has_next, on_click=step_raw_page, args=(1,))
+
+def render_weather(result):
+    """Renders a Precipitation or Temperature result from fetch_results()"""
+    selection = result["selection"]
+    parameter = selection["parameter"]
+    weather_data, series, stats = result["data"], result["series"], result["stats"]
+
+    if weather_data is None:
+        st.error("Failed to fetch weather data.")
+        return
+
+    if len(weather_data) == 0:
+        st.info("No rows match the selected filters.")
+        return
+
+    if parameter == "Precipitation":
+        # Plot Precipitation from a downsampled series over the full range
+        st.subheader("Precipitation over Time")
+        if series is not None and len(series) > 0:
+            render_series(series, selection, "date", "prcp_inches", "Precipitation (inches)")
         else:
-            st.info("No numeric dmr_value to plot.")
-        
-        # Raw data
-        st.subheader("Raw Data")
-        st.dataframe(df)
-
-        # Statistical Analysis Table
-        if "dmr_value" in df.columns and df["dmr_value"].notnull().any():
-            st.subheader("Statistical Analysis")
-
-            numeric_series = pd.to_numeric(df["dmr_value"], errors="coerce").dropna()
-
-            if len(numeric_series) > 0:
-                # Get the unit for display
-                unit_str = f" ({selected_unit})" if selected_unit else ""
-                
-                stats = {
-                    f"Minimum{unit_str}": numeric_series.min(),
-                    f"Average{unit_str}": numeric_series.mean(),
-                    f"Median{unit_str}": numeric_series.median(),
-                    f"Maximum{unit_str}": numeric_series.max(),
-                    f"Standard Deviation{unit_str}": numeric_series.std(),
-                    f"Variance{unit_str}": numeric_series.var(),
-                    "Kurtosis": numeric_series.kurtosis(),
-                    "Skewness": numeric_series.skew(),
-                }
-
-                stats_df = pd.DataFrame(stats, index=["Value"]).T
-                st.table(stats_df)
-            else:
-                st.info("No numeric values available for statistical analysis.")
+            st.info("No precipitation data available to plot.")
+
+        # Statistical Analysis for Precipitation, computed over the full series
+        render_stats(stats, " (inches)")
+
+    elif parameter == "Temperature":
+        # Plot Temperature based on selected base (Tmax, Tmin, Tavg)
+        base = selection["base"]
+        st.subheader(f"Temperature ({base}) over Time")
+        temp_col = TEMPERATURE_COLUMNS.get(base)
+        if series is not None and len(series) > 0:
+            render_series(series, selection, "date", temp_col, f"{base} (°F)")
         else:
-            st.info("No numeric dmr_value column found for statistical analysis.")
+            st.info(f"No {base} temperature data available to plot.")
+
+        # Statistical Analysis for Temperature, computed over the full series
+        render_stats(stats, " (°F)")
+
+    # Raw data
+    render_raw_table(selection)
+
+def render_npdes(result):
+    """Renders an NPDES result from fetch_results()"""
+    selection = result["selection"]
+    data, series, stats = result["data"], result["series"], result["stats"]
+
+    if data is None:
+        st.error("Failed to fetch data.")
+        return
+
+    if len(data) == 0:
+        st.info("No rows match the selected filters.")
+        return
+
+    # Plot DMR Value vs Date
+    if selection["parameter"]:
+        st.subheader(f"{selection['parameter']} over Time")
+    else:
+        st.subheader("DMR Value over Time")
+
+    unit = selection["unit"]
+    if series is not None and len(series) > 0:
+        # Label with unit if available
+        label = f"DMR Value ({unit})" if unit else "DMR Value"
+        render_series(series, selection, "monitoring_period_date", "dmr_value", label)
+    else:
+        st.info("No numeric dmr_value to plot.")
+
+    # Raw data
+    render_raw_table(selection)
+
+    # Statistical Analysis Table, computed over the full series
+    render_stats(stats, f" ({unit})" if unit else "")
+
+with st.sidebar:
+    sidebar_filters()
 
+# The last applied selection is rendered from session state, so reruns
+# (theme changes, resizing, editing filters) do not fetch it again
+result = st.session_state.results.get(st.session_state.get("applied"))
+if result is None:
+    st.info("Set filters and click 'Apply Filter' to fetch data.")
+elif result["selection"]["parameter"] in WEATHER_PARAMETERS:
+    render_weather(result)
 else:
-    st.info("Set filters and click 'Apply Filter' to fetch data.")
\ No newline at end of file
+    render_npdes(result)
\ No newline at end of file
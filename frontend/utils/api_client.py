@@ -1,6 +1,18 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import pandas as pd
+import pyarrow as pa
 from dotenv import load_dotenv
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import functools
+import inspect
+import json
 import os
+import threading
+import time
 
 # Load .env from project root
 BASE = os.path.dirname(os.path.dirname(__file__))
@@ -8,80 +20,591 @@ load_dotenv()
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8080")
 
-def get_filters():
+NDJSON_MIMETYPE = "application/x-ndjson"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+# Prefer Arrow; older backends ignore it and answer with JSON
+FRAME_ACCEPT = f"{ARROW_MIMETYPE}, application/json;q=0.9"
+
+# Column types the Arrow path delivers natively; applied to JSON bodies
+DATA_DATE_COLUMNS = {"monitoring_period_date": "%m/%d/%Y", "ingestion_timestamp": None}
+DATA_NUMERIC_COLUMNS = ["dmr_value"]
+WEATHER_DATE_COLUMNS = {"date": None, "ingestion_timestamp": None}
+WEATHER_NUMERIC_COLUMNS = ["tavg_fahrenheit", "tmax_fahrenheit", "tmin_fahrenheit", "prcp_inches", "snow_inches", "snwd_inches"]
+
+# Endpoint and column types for each kind of paged table
+TABLE_ENDPOINTS = {
+    "data": ("/data", DATA_DATE_COLUMNS, DATA_NUMERIC_COLUMNS),
+    "weather": ("/weather/data", WEATHER_DATE_COLUMNS, WEATHER_NUMERIC_COLUMNS),
+}
+
+# Point budget for downsampled chart series, about a wide chart's pixel width
+CHART_POINTS = 1500
+
+# Rows parsed into each intermediate DataFrame when reading a stream
+NDJSON_CHUNK_ROWS = 5000
+
+# Seconds to wait for row requests; sent as X-Request-Timeout so the backend
+# cancels the BigQuery job once we have stopped waiting for it
+DATA_TIMEOUT = 60
+
+# Keep-alive connections to the backend kept per process, and threads for
+# fetch_all(); every Streamlit session shares both
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 16))
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", 8))
+
+# Retries for connection errors and transient gateway responses, with
+# exponential backoff (0.5s, 1s, 2s). Read timeouts and 504 are not retried:
+# the backend already gave up on the query at our deadline
+HTTP_RETRIES = Retry(
+    total=3,
+    read=0,
+    backoff_factor=0.5,
+    status_forcelist=(429, 502, 503),
+    allowed_methods=("GET",),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+def _make_session():
+    """requests.Session with a pooled, retrying adapter for the backend"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=HTTP_RETRIES)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+SESSION = _make_session()
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="api_client")
+
+def fetch_all(*calls):
+    """
+    Runs independent requests concurrently and returns their results in the
+    same order. Each call is a function taking no arguments, e.g.
+
+        filters, weather_filters = fetch_all(get_filters, get_weather_filters)
+        data, stats = fetch_all(
+            functools.partial(get_data, outfall="001"),
+            functools.partial(get_data_stats, outfall="001"),
+        )
+
+    The getters report errors by returning None, so one failed request does
+    not affect the others.
+    """
+    futures = [_fetch_pool.submit(call) for call in calls]
+    return [future.result() for future in futures]
+
+# Seconds an export download may wait for each chunk of its body
+EXPORT_TIMEOUT = 300
+
+# Bytes of response bodies kept for revalidation with If-None-Match
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+_response_cache = OrderedDict()  # (url, params, accept) -> Response with ETag
+_response_cache_bytes = 0
+_response_cache_lock = threading.Lock()
+
+def _get(url, params=None, headers=None, timeout=30, stream=False):
+    """
+    SESSION.get() with conditional caching. The last response for the same
+    URL, params and Accept header is revalidated with If-None-Match, and on
+    304 the stored response is returned instead of downloading it again.
+    Streamed requests are passed straight through.
+    """
+    if stream:
+        return SESSION.get(url, params=params, headers=headers, timeout=timeout, stream=True)
+
+    headers = dict(headers or {})
+    key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())), headers.get("Accept", ""))
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            _response_cache.move_to_end(key)
+    if cached is not None:
+        headers["If-None-Match"] = cached.headers["ETag"]
+
+    r = SESSION.get(url, params=params, headers=headers, timeout=timeout)
+    if r.status_code == 304 and cached is not None:
+        return cached
+    if r.status_code == 200 and r.headers.get("ETag"):
+        _store_response(key, r)
+    return r
+
+def _store_response(key, r):
+    """Keeps r for revalidation, evicting least recently used bodies"""
+    global _response_cache_bytes
+    size = len(r.content)
+    if size > RESPONSE_CACHE_MAX_BYTES:
+        return
+    with _response_cache_lock:
+        previous = _response_cache.pop(key, None)
+        if previous is not None:
+            _response_cache_bytes -= len(previous.content)
+        _response_cache[key] = r
+        _response_cache_bytes += size
+        while _response_cache_bytes > RESPONSE_CACHE_MAX_BYTES:
+            _, evicted = _response_cache.popitem(last=False)
+            _response_cache_bytes -= len(evicted.content)
+
+# Seconds a memoized result is reused before the backend is asked again;
+# filter values change only when new data is loaded
+FILTERS_TTL = int(os.getenv("FILTERS_TTL", 600))
+DATA_TTL = int(os.getenv("DATA_TTL", 300))
+
+# Bytes of memoized results kept per process, shared by all sessions
+MEMO_CACHE_MAX_BYTES = int(os.getenv("MEMO_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+_memo_cache = OrderedDict()  # (function, arguments) -> (expires_at, size, value)
+_memo_cache_bytes = 0
+_memo_cache_lock = threading.Lock()
+
+def memoize(ttl):
+    """
+    Caches a getter's results for ttl seconds, keyed by its arguments
+    (defaults filled in, so positional and keyword calls share entries).
+    The cache lives at module level, so every Streamlit session in the
+    process shares it, and is bounded by MEMO_CACHE_MAX_BYTES with least
+    recently used eviction. None (a failed request) is never cached.
+    Callers get a copy, so changing a returned DataFrame or dict does not
+    change what other sessions see.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps([fn.__name__, bound.arguments], sort_keys=True, default=str)
+
+            now = time.monotonic()
+            with _memo_cache_lock:
+                entry = _memo_cache.get(key)
+                if entry is not None and entry[0] > now:
+                    _memo_cache.move_to_end(key)
+                    return _copy_result(entry[2])
+
+            value = fn(*args, **kwargs)
+            if value is not None:
+                _store_result(key, now + ttl, value)
+            return _copy_result(value)
+
+        return wrapper
+    return decorator
+
+def clear_cache():
+    """Drops all memoized results, so the next calls ask the backend again"""
+    global _memo_cache_bytes
+    with _memo_cache_lock:
+        _memo_cache.clear()
+        _memo_cache_bytes = 0
+
+def _store_result(key, expires_at, value):
+    """Keeps value until expires_at, evicting least recently used results"""
+    global _memo_cache_bytes
+    size = _result_size(value)
+    if size > MEMO_CACHE_MAX_BYTES:
+        return
+    with _memo_cache_lock:
+        previous = _memo_cache.pop(key, None)
+        if previous is not None:
+            _memo_cache_bytes -= previous[1]
+        _memo_cache[key] = (expires_at, size, value)
+        _memo_cache_bytes += size
+        while _memo_cache_bytes > MEMO_CACHE_MAX_BYTES:
+            _, (_, evicted_size, _) = _memo_cache.popitem(last=False)
+            _memo_cache_bytes -= evicted_size
+
+def _result_size(value):
+    """Approximate bytes held by a memoized result"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return len(json.dumps(value, default=str))
+
+def _copy_result(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    return copy.deepcopy(value)
+
+def _read_frame(r, date_columns, numeric_columns):
+    """
+    Turns a data response into a typed DataFrame. Arrow bodies are read
+    as-is; JSON and NDJSON bodies are parsed and coerced to the same types.
+    """
+    content_type = r.headers.get("Content-Type", "")
+    if content_type.startswith(ARROW_MIMETYPE):
+        with pa.ipc.open_stream(r.content) as reader:
+            return reader.read_pandas(date_as_object=False)
+
+    if content_type.startswith(NDJSON_MIMETYPE):
+        df = _read_ndjson_frame(r)
+    else:
+        df = pd.DataFrame(r.json().get("data", []))
+    for col, fmt in date_columns.items():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce")
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+def _read_ndjson_frame(r):
+    """Builds a DataFrame from a streamed NDJSON response chunk by chunk"""
+    frames = []
+    chunk = []
+    for line in r.iter_lines():
+        if not line:
+            continue
+        chunk.append(json.loads(line))
+        if len(chunk) >= NDJSON_CHUNK_ROWS:
+            frames.append(pd.DataFrame(chunk))
+            chunk = []
+    if chunk:
+        frames.append(pd.DataFrame(chunk))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def _data_params(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None):
+    """Query params for the NPDES filters, leaving out empty ones"""
+    params = {
+        "outfall": outfall,
+        "parameter": parameter,
+        "base": base,
+        "unit": unit,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    return {key: value for key, value in params.items() if value}
+
+def _weather_params(station_id=None, parent_facility_id=None, start_date=None, end_date=None):
+    """Query params for the weather filters, leaving out empty ones"""
+    params = {
+        "station_id": station_id,
+        "parent_facility_id": parent_facility_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    return {key: value for key, value in params.items() if value}
+
+def _read_series(r, date_column):
+    """DataFrame from a downsampled series response, with dates parsed"""
+    df = pd.DataFrame(r.json().get("data", []))
+    if date_column in df.columns:
+        df[date_column] = pd.to_datetime(df[date_column], errors="coerce")
+    return df
+
+@memoize(FILTERS_TTL)
+def get_filters(outfall=None, parameter=None, base=None, unit=None):
+    """
+    Get dropdown values. Any selections passed in narrow the other
+    dropdowns to values that still have matching rows.
+    """
+    params = _data_params(outfall, parameter, base, unit)
+
     try:
-        r = requests.get(f"{BACKEND_URL}/filters", timeout=30)
+        r = _get(f"{BACKEND_URL}/filters", params=params, timeout=30)
         r.raise_for_status()
         return r.json()
     except Exception as e:
         print("Error fetching filters:", e)
         return None
 
-def get_data(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, limit=1000):
-    params = {}
-    if outfall:
-        params["outfall"] = outfall
-    if parameter:
-        params["parameter"] = parameter
-    if base:
-        params["base"] = base
-    if unit:
-        params["unit"] = unit
-    if start_date:
-        params["start_date"] = start_date
-    if end_date:
-        params["end_date"] = end_date
+@memoize(DATA_TTL)
+def get_data(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, limit=1000, stream=False, fields=None):
+    """
+    Get NPDES rows as a typed DataFrame. Requested as Arrow by default, or
+    read incrementally from a newline-delimited JSON stream when stream=True.
+    fields limits the columns fetched (all when None).
+    """
+    page = get_data_page(outfall, parameter, base, unit, start_date, end_date, limit, stream=stream, fields=fields)
+    if page is None:
+        return None
+    return page[0]
+
+def get_data_page(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, limit=1000, cursor=None, stream=False, fields=None):
+    """
+    Get one page of NPDES rows. Returns (DataFrame, next_cursor), where
+    next_cursor is passed back to fetch the following page and is None after
+    the last one.
+    """
+    params = _data_params(outfall, parameter, base, unit, start_date, end_date)
+    if cursor:
+        params["cursor"] = cursor
+    if fields:
+        params["fields"] = ",".join(fields)
     params["limit"] = limit
+    if stream:
+        params["stream"] = 1
+    headers = {
+        "Accept": NDJSON_MIMETYPE if stream else FRAME_ACCEPT,
+        "X-Request-Timeout": str(DATA_TIMEOUT),
+    }
 
     try:
-        r = requests.get(f"{BACKEND_URL}/data", params=params, timeout=60)
+        r = _get(f"{BACKEND_URL}/data", params=params, headers=headers, timeout=DATA_TIMEOUT, stream=stream)
         r.raise_for_status()
-        payload = r.json()
-        return payload.get("data", [])
+        df = _read_frame(r, DATA_DATE_COLUMNS, DATA_NUMERIC_COLUMNS)
+        return df, r.headers.get("X-Next-Cursor")
     except Exception as e:
         print("Error fetching data:", e)
         return None
 
-def get_data_by_outfall(outfall, limit=10000):
+def iter_data_pages(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, page_size=5000, fields=None):
+    """
+    Yields DataFrames of up to page_size rows, in date order, until the
+    whole matching history has been read. Each request costs one bounded
+    page regardless of how far into the history it is.
+    """
+    cursor = None
+    while True:
+        page = get_data_page(outfall, parameter, base, unit, start_date, end_date, page_size, cursor=cursor, fields=fields)
+        if page is None:
+            raise RuntimeError("Failed to fetch data page")
+        df, cursor = page
+        if len(df):
+            yield df
+        if not cursor:
+            return
+
+@memoize(DATA_TTL)
+def get_data_stats(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, group_by=None):
+    """
+    Get dmr_value statistics computed server-side over the full series.
+    Returns a list of dicts (one per group_by group), or None on error.
+    """
+    params = _data_params(outfall, parameter, base, unit, start_date, end_date)
+    if group_by:
+        params["group_by"] = ",".join(group_by)
+
+    try:
+        r = _get(f"{BACKEND_URL}/data/stats", params=params, timeout=60)
+        r.raise_for_status()
+        return r.json().get("stats", [])
+    except Exception as e:
+        print("Error fetching data stats:", e)
+        return None
+
+@memoize(DATA_TTL)
+def get_data_series(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, bucket=None, points=CHART_POINTS):
+    """
+    Get a downsampled dmr_value series for charts, covering the full history.
+    bucket ("day", "week", "month") gives the mean plus dmr_value_min and
+    dmr_value_max per bucket; otherwise the series is cut to `points` with
+    shape-preserving sampling.
+    """
+    params = _data_params(outfall, parameter, base, unit, start_date, end_date)
+    if bucket:
+        params["bucket"] = bucket
+    else:
+        params["points"] = points
+
+    try:
+        r = _get(f"{BACKEND_URL}/data", params=params, timeout=60)
+        r.raise_for_status()
+        return _read_series(r, "monitoring_period_date")
+    except Exception as e:
+        print("Error fetching data series:", e)
+        return None
+
+def get_data_with_weather(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, lookback_days=7, station_id=None, limit=1000):
+    """
+    Get NPDES rows joined server-side to precipitation: prcp_inches is the
+    rainfall summed over the lookback_days before each monitoring date.
+    Returns a typed DataFrame, or None on error.
+    """
+    params = _data_params(outfall, parameter, base, unit, start_date, end_date)
+    params["lookback_days"] = lookback_days
+    params["limit"] = limit
+    if station_id:
+        params["station_id"] = station_id
+
+    try:
+        r = _get(f"{BACKEND_URL}/data/with-weather", params=params, timeout=60)
+        r.raise_for_status()
+        return _read_frame(r, DATA_DATE_COLUMNS, DATA_NUMERIC_COLUMNS + ["prcp_inches"])
+    except Exception as e:
+        print("Error fetching data with weather:", e)
+        return None
+
+def get_data_by_outfall(outfall, limit=10000, stream=False, fields=None):
     """Get all data for a specific outfall"""
     params = {
         "outfall": outfall,
         "limit": limit
     }
+    if fields:
+        params["fields"] = ",".join(fields)
+    if stream:
+        params["stream"] = 1
     
     try:
-        r = requests.get(f"{BACKEND_URL}/data/by-outfall", params=params, timeout=60)
+        headers = {"X-Request-Timeout": str(DATA_TIMEOUT)}
+        r = _get(f"{BACKEND_URL}/data/by-outfall", params=params, headers=headers, timeout=DATA_TIMEOUT, stream=stream)
         r.raise_for_status()
+        if stream:
+            return _read_ndjson_frame(r)
         payload = r.json()
         return payload.get("data", [])
     except Exception as e:
         print("Error fetching outfall data:", e)
         return None
 
+def get_data_by_outfalls(outfalls, **kwargs):
+    """
+    Fetches get_data() for several outfalls concurrently, e.g. for a
+    comparison view. kwargs are passed to every get_data() call. Returns
+    {outfall: DataFrame or None}. Not memoized itself: each get_data()
+    call already is.
+    """
+    calls = [functools.partial(get_data, outfall=outfall, **kwargs) for outfall in outfalls]
+    return dict(zip(outfalls, fetch_all(*calls)))
+
+def get_data_table_page(outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, page=0, page_size=50, sort=None, fields=None):
+    """
+    One page of NPDES rows for a paged table, sorted server-side. sort is a
+    column name, "-column" for descending (default date order). Returns
+    (DataFrame, has_next), or None on error; see _table_page().
+    """
+    params = _data_params(outfall, parameter, base, unit, start_date, end_date)
+    return _table_page("data", params, page, page_size, sort, fields)
+
+def get_weather_table_page(station_id=None, parent_facility_id=None, start_date=None, end_date=None, page=0, page_size=50, sort=None, fields=None):
+    """Same as get_data_table_page() for weather rows"""
+    params = _weather_params(station_id, parent_facility_id, start_date, end_date)
+    return _table_page("weather", params, page, page_size, sort, fields)
+
+def _table_page(kind, params, page, page_size, sort, fields):
+    """
+    Fetches only the requested page. When there is a next one, it is
+    fetched in the background so paging forward is answered from the cache.
+    """
+    df = _fetch_table_rows(kind, params, page * page_size, page_size, sort, fields)
+    if df is None:
+        return None
+    has_next = len(df) > page_size
+    if has_next:
+        _fetch_pool.submit(_fetch_table_rows, kind, params, (page + 1) * page_size, page_size, sort, fields)
+    return df.iloc[:page_size], has_next
+
+@memoize(DATA_TTL)
+def _fetch_table_rows(kind, params, offset, page_size, sort, fields):
+    """
+    page_size + 1 rows from offset; the extra row only tells whether
+    another page follows
+    """
+    path, date_columns, numeric_columns = TABLE_ENDPOINTS[kind]
+    params = dict(params, offset=offset, limit=page_size + 1)
+    if sort:
+        params["sort"] = sort
+    if fields:
+        params["fields"] = ",".join(fields)
+    headers = {"Accept": FRAME_ACCEPT, "X-Request-Timeout": str(DATA_TIMEOUT)}
+
+    try:
+        r = _get(f"{BACKEND_URL}{path}", params=params, headers=headers, timeout=DATA_TIMEOUT)
+        r.raise_for_status()
+        return _read_frame(r, date_columns, numeric_columns)
+    except Exception as e:
+        print("Error fetching table page:", e)
+        return None
+
+def export_data(path, format="parquet", outfall=None, parameter=None, base=None, unit=None, start_date=None, end_date=None, fields=None, sort=None):
+    """
+    Saves every NPDES row matching the filters to the file at path, as
+    Parquet or, with format="csv", gzip-compressed CSV. The body is
+    written to disk as it arrives, so exports of millions of rows use
+    little memory. The file only appears once complete. Returns path, or
+    None on error.
+    """
+    params = _data_params(outfall, parameter, base, unit, start_date, end_date)
+    params["format"] = format
+    if fields:
+        params["fields"] = ",".join(fields)
+    if sort:
+        params["sort"] = sort
+    headers = {"X-Request-Timeout": str(DATA_TIMEOUT)}
+    partial_path = f"{path}.part"
+
+    try:
+        with SESSION.get(f"{BACKEND_URL}/export", params=params, headers=headers, timeout=(30, EXPORT_TIMEOUT), stream=True) as r:
+            r.raise_for_status()
+            with open(partial_path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+        os.replace(partial_path, path)
+        return path
+    except Exception as e:
+        print("Error exporting data:", e)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return None
+
+@memoize(FILTERS_TTL)
 def get_weather_filters():
     """Get precipitation weather dropdown filters"""
     try:
-        r = requests.get(f"{BACKEND_URL}/weather/filters", timeout=30)
+        r = _get(f"{BACKEND_URL}/weather/filters", timeout=30)
         r.raise_for_status()
         return r.json()
     except Exception as e:
         print("Error fetching weather filters:", e)
         return None
 
-def get_weather_data(station_id=None, parent_facility_id=None, limit=1000):
-    """Get precipitation weather data"""
-    params = {}
-    if station_id:
-        params["station_id"] = station_id
-    if parent_facility_id:
-        params["parent_facility_id"] = parent_facility_id
+@memoize(DATA_TTL)
+def get_weather_data(station_id=None, parent_facility_id=None, start_date=None, end_date=None, limit=1000, stream=False, fields=None):
+    """
+    Get precipitation weather data as a typed DataFrame ordered by date
+    (Arrow by default, newline-delimited JSON when stream=True).
+    fields limits the columns fetched (all when None).
+    """
+    params = _weather_params(station_id, parent_facility_id, start_date, end_date)
+    if fields:
+        params["fields"] = ",".join(fields)
     params["limit"] = limit
+    if stream:
+        params["stream"] = 1
+
+    headers = {
+        "Accept": NDJSON_MIMETYPE if stream else FRAME_ACCEPT,
+        "X-Request-Timeout": str(DATA_TIMEOUT),
+    }
 
     try:
-        r = requests.get(f"{BACKEND_URL}/weather/data", params=params, timeout=60)
+        r = _get(f"{BACKEND_URL}/weather/data", params=params, headers=headers, timeout=DATA_TIMEOUT, stream=stream)
         r.raise_for_status()
-        payload = r.json()
-        return payload.get("data", [])
+        return _read_frame(r, WEATHER_DATE_COLUMNS, WEATHER_NUMERIC_COLUMNS)
     except Exception as e:
         print("Error fetching weather data:", e)
-        return None
\ No newline at end of file
+        return None
+
+@memoize(DATA_TTL)
+def get_weather_stats(station_id=None, parent_facility_id=None, start_date=None, end_date=None, column="prcp_inches", group_by=None):
+    """Get statistics for one weather column computed server-side"""
+    params = _weather_params(station_id, parent_facility_id, start_date, end_date)
+    params["column"] = column
+    if group_by:
+        params["group_by"] = ",".join(group_by)
+
+    try:
+        r = _get(f"{BACKEND_URL}/weather/stats", params=params, timeout=60)
+        r.raise_for_status()
+        return r.json().get("stats", [])
+    except Exception as e:
+        print("Error fetching weather stats:", e)
+        return None
+
+@memoize(DATA_TTL)
+def get_weather_series(station_id=None, parent_facility_id=None, start_date=None, end_date=None, column="prcp_inches", bucket=None, points=CHART_POINTS):
+    """Same as get_data_series() for one weather column; dates are in "date" """
+    params = _weather_params(station_id, parent_facility_id, start_date, end_date)
+    params["column"] = column
+    if bucket:
+        params["bucket"] = bucket
+    else:
+        params["points"] = points
+
+    try:
+        r = _get(f"{BACKEND_URL}/weather/data", params=params, timeout=60)
+        r.raise_for_status()
+        return _read_series(r, "date")
+    except Exception as e:
+        print("Error fetching weather series:", e)
+        return None
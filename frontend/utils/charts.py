@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Widest plot area we expect, in pixels; the decimation budget is derived
+# from it so a zoomed-out chart looks the same as the full series
+CHART_WIDTH_PX = 1500
+
+# Rows kept per horizontal pixel; more than one leaves detail for zooming in
+POINTS_PER_PIXEL = 4
+
+# Fill between the min and max lines of a bucketed series
+BAND_FILL = "rgba(99, 110, 250, 0.2)"
+
+# Quick zoom buttons above the x axis
+RANGE_BUTTONS = [
+    dict(count=1, label="1m", step="month", stepmode="backward"),
+    dict(count=6, label="6m", step="month", stepmode="backward"),
+    dict(count=1, label="1y", step="year", stepmode="backward"),
+    dict(step="all", label="All"),
+]
+
+def decimate(df, x, columns, max_points):
+    """
+    Cuts df (sorted by x) to about max_points rows. The rows are split into
+    equal buckets, and each bucket keeps its first and last rows plus the
+    rows holding the minimum and maximum of every column, so spikes and
+    dips survive that plain sampling would drop. Rows stay in x order.
+    """
+    columns = [col for col in columns if col in df.columns]
+    n = len(df)
+    if n <= max_points or not columns:
+        return df
+
+    buckets = max(1, max_points // (2 + 2 * len(columns)))
+    bucket = np.arange(n) * buckets // n
+    starts = np.searchsorted(bucket, np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+
+    keep = np.zeros(n, dtype=bool)
+    keep[starts] = True
+    keep[ends] = True
+    for col in columns:
+        values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        # Within each bucket, sorting by value puts the minimum first (and
+        # NaN last); sorting by -value puts the maximum first
+        keep[np.lexsort((values, bucket))[starts]] = True
+        keep[np.lexsort((-values, bucket))[starts]] = True
+    return df[keep]
+
+def visible_rows(df, x, x_range):
+    """
+    Rows of df (sorted by x) inside x_range = (start, end), either end None
+    for open, plus one row either side so lines run to the plot edges.
+    """
+    if x_range is None:
+        return df
+    start, end = x_range
+    values = df[x]
+    first = 0 if start is None else max(values.searchsorted(pd.Timestamp(start), side="left") - 1, 0)
+    last = len(df) if end is None else values.searchsorted(pd.Timestamp(end), side="right") + 1
+    return df.iloc[first:last]
+
+def series_figure(series, x, y, label, x_range=None, max_points=None):
+    """
+    Line chart of one series as WebGL (Scattergl) traces, which stay smooth
+    with tens of thousands of points.
+
+    series: DataFrame with an x column and a y column; when the bucketed
+        series endpoints also return y_min and y_max, they are drawn as a
+        shaded band behind the mean
+    x_range: (start, end) the chart initially shows; decimation budget is
+        spent on rows inside it
+    max_points: rows to draw at most, CHART_WIDTH_PX * POINTS_PER_PIXEL by
+        default (see decimate())
+    """
+    max_points = max_points or CHART_WIDTH_PX * POINTS_PER_PIXEL
+    band = [f"{y}_min", f"{y}_max"]
+    has_band = all(col in series.columns for col in band)
+
+    rows = series.sort_values(x) if not series[x].is_monotonic_increasing else series
+    rows = decimate(visible_rows(rows, x, x_range), x, [y] + (band if has_band else []), max_points)
+
+    figure = go.Figure()
+    if has_band:
+        figure.add_trace(go.Scattergl(
+            x=rows[x], y=rows[band[0]], name=f"{label} min",
+            mode="lines", line=dict(width=0), showlegend=False,
+        ))
+        figure.add_trace(go.Scattergl(
+            x=rows[x], y=rows[band[1]], name=f"{label} min–max",
+            mode="lines", line=dict(width=0), fill="tonexty", fillcolor=BAND_FILL,
+        ))
+        label = f"{label} mean"
+    figure.add_trace(go.Scattergl(x=rows[x], y=rows[y], name=label, mode="lines"))
+
+    figure.update_layout(
+        margin=dict(l=0, r=0, t=30, b=0),
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0),
+        # Keeps the user's zoom when the same chart is drawn again
+        uirevision=label,
+        xaxis=dict(
+            type="date",
+            range=list(x_range) if x_range and None not in x_range else None,
+            rangeselector=dict(buttons=RANGE_BUTTONS),
+        ),
+    )
+    return figure